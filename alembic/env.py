@@ -19,7 +19,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from app.database import Base
 from app.models.user import User
-# from app.models.post import Post
+from app.models.post import Post
 
 # add your model's MetaData object here
 # for 'autogenerate' support
@@ -0,0 +1,79 @@
+"""normalize_post_tags
+
+Revision ID: 0b7d4e9a21c3
+Revises: f6b20d9c4e58
+Create Date: 2026-10-15 15:48:12.560917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7d4e9a21c3'
+down_revision: Union[str, Sequence[str], None] = 'f6b20d9c4e58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'tags',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    op.create_table(
+        'post_tags',
+        sa.Column('post_id', sa.UUID(), nullable=False),
+        sa.Column('tag_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('post_id', 'tag_id'),
+    )
+    op.execute(
+        'INSERT INTO tags (name) '
+        'SELECT DISTINCT unnest(tags) FROM posts ORDER BY 1'
+    )
+    op.execute(
+        'INSERT INTO post_tags (post_id, tag_id) '
+        'SELECT DISTINCT p.id, t.id FROM posts p '
+        'CROSS JOIN LATERAL unnest(p.tags) AS n(name) '
+        'JOIN tags t ON t.name = n.name'
+    )
+    op.create_index(
+        'idx_post_tags_tag', 'post_tags', ['tag_id', 'post_id'], unique=False
+    )
+    op.drop_index('idx_posts_tags', table_name='posts', postgresql_using='gin')
+    op.drop_column('posts', 'tags')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        'posts',
+        sa.Column(
+            'tags',
+            postgresql.ARRAY(sa.String(length=50)),
+            server_default=sa.text("'{}'"),
+            nullable=False,
+        ),
+    )
+    op.execute(
+        'UPDATE posts p SET tags = pt.names FROM ('
+        'SELECT post_tags.post_id, array_agg(tags.name ORDER BY tags.name) AS names '
+        'FROM post_tags JOIN tags ON tags.id = post_tags.tag_id '
+        'GROUP BY post_tags.post_id'
+        ') pt WHERE p.id = pt.post_id'
+    )
+    op.create_index(
+        'idx_posts_tags', 'posts', ['tags'], unique=False, postgresql_using='gin'
+    )
+    op.drop_index('idx_post_tags_tag', table_name='post_tags')
+    op.drop_table('post_tags')
+    op.drop_table('tags')
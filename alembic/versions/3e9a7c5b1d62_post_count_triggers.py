@@ -0,0 +1,93 @@
+"""post_count_triggers
+
+Revision ID: 3e9a7c5b1d62
+Revises: d58c1f3a7b90
+Create Date: 2026-10-15 16:24:51.903318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e9a7c5b1d62'
+down_revision: Union[str, Sequence[str], None] = 'd58c1f3a7b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Start from the real counts; the triggers keep them current from here
+    op.execute("""
+        UPDATE posts SET like_count =
+            (SELECT count(*) FROM likes WHERE likes.post_id = posts.id)
+    """)
+    op.execute("""
+        UPDATE posts SET comment_count =
+            (SELECT count(*) FROM comments WHERE comments.post_id = posts.id)
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION likes_update_post_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE posts SET like_count = like_count + d.n
+                FROM (SELECT post_id, count(*) AS n FROM new_rows GROUP BY post_id) d
+                WHERE posts.id = d.post_id;
+            ELSE
+                UPDATE posts SET like_count = like_count - d.n
+                FROM (SELECT post_id, count(*) AS n FROM old_rows GROUP BY post_id) d
+                WHERE posts.id = d.post_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER likes_insert_post_count AFTER INSERT ON likes
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION likes_update_post_count()
+    """)
+    op.execute("""
+        CREATE TRIGGER likes_delete_post_count AFTER DELETE ON likes
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION likes_update_post_count()
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION comments_update_post_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE posts SET comment_count = comment_count + d.n
+                FROM (SELECT post_id, count(*) AS n FROM new_rows GROUP BY post_id) d
+                WHERE posts.id = d.post_id;
+            ELSE
+                UPDATE posts SET comment_count = comment_count - d.n
+                FROM (SELECT post_id, count(*) AS n FROM old_rows GROUP BY post_id) d
+                WHERE posts.id = d.post_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER comments_insert_post_count AFTER INSERT ON comments
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION comments_update_post_count()
+    """)
+    op.execute("""
+        CREATE TRIGGER comments_delete_post_count AFTER DELETE ON comments
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION comments_update_post_count()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER IF EXISTS comments_delete_post_count ON comments')
+    op.execute('DROP TRIGGER IF EXISTS comments_insert_post_count ON comments')
+    op.execute('DROP FUNCTION IF EXISTS comments_update_post_count()')
+    op.execute('DROP TRIGGER IF EXISTS likes_delete_post_count ON likes')
+    op.execute('DROP TRIGGER IF EXISTS likes_insert_post_count ON likes')
+    op.execute('DROP FUNCTION IF EXISTS likes_update_post_count()')
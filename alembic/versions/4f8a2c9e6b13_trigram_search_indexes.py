@@ -0,0 +1,40 @@
+"""trigram_search_indexes
+
+Revision ID: 4f8a2c9e6b13
+Revises: 9c1e4b7a2d35
+Create Date: 2026-10-15 09:41:07.562190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f8a2c9e6b13'
+down_revision: Union[str, Sequence[str], None] = '9c1e4b7a2d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAM_INDEXES = [
+    ('idx_posts_title_trgm', 'posts', 'title'),
+    ('idx_posts_excerpt_trgm', 'posts', 'excerpt'),
+    ('idx_posts_content_trgm', 'posts', 'content'),
+    ('idx_users_email_trgm', 'users', 'email'),
+    ('idx_users_username_trgm', 'users', 'username'),
+    ('idx_users_full_name_trgm', 'users', 'full_name'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        op.create_index(name, table, [column], unique=False, postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(TRIGRAM_INDEXES):
+        op.drop_index(name, table_name=table, postgresql_using='gin')
@@ -0,0 +1,44 @@
+"""posts_feed_indexes
+
+Revision ID: 5d2f8b6c0e41
+Revises: e1b94d07a3c6
+Create Date: 2026-10-15 14:37:51.402683
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2f8b6c0e41'
+down_revision: Union[str, Sequence[str], None] = 'e1b94d07a3c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'idx_posts_published_at',
+        'posts',
+        ['published_at'],
+        unique=False,
+        postgresql_where=sa.text('published = true'),
+    )
+    op.create_index(
+        'idx_posts_author_published',
+        'posts',
+        ['author_id', 'published_at'],
+        unique=False,
+        postgresql_where=sa.text('published = true'),
+    )
+    op.drop_index(op.f('ix_posts_published'), table_name='posts')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_posts_published'), 'posts', ['published'], unique=False)
+    op.drop_index('idx_posts_author_published', table_name='posts')
+    op.drop_index('idx_posts_published_at', table_name='posts')
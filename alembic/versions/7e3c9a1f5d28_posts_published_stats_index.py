@@ -0,0 +1,35 @@
+"""posts_published_stats_index
+
+Revision ID: 7e3c9a1f5d28
+Revises: b2d7e5a1c804
+Create Date: 2026-10-15 11:42:17.260114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e3c9a1f5d28'
+down_revision: Union[str, Sequence[str], None] = 'b2d7e5a1c804'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'idx_posts_published_stats',
+        'posts',
+        ['author_id'],
+        unique=False,
+        postgresql_include=['view_count'],
+        postgresql_where=sa.text('published = true'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_posts_published_stats', table_name='posts')
@@ -0,0 +1,98 @@
+"""partition_likes_by_post
+
+Revision ID: 8a1f6d2c9e04
+Revises: 3e9a7c5b1d62
+Create Date: 2026-10-15 16:47:09.215736
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a1f6d2c9e04'
+down_revision: Union[str, Sequence[str], None] = '3e9a7c5b1d62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+
+
+def _create_count_triggers() -> None:
+    # likes_update_post_count() is from 3e9a7c5b1d62; triggers stay with the
+    # renamed table, so they are recreated on the new one
+    op.execute("""
+        CREATE TRIGGER likes_insert_post_count AFTER INSERT ON likes
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION likes_update_post_count()
+    """)
+    op.execute("""
+        CREATE TRIGGER likes_delete_post_count AFTER DELETE ON likes
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION likes_update_post_count()
+    """)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('likes', 'likes_old')
+    op.execute('ALTER TABLE likes_old RENAME CONSTRAINT likes_pkey TO likes_old_pkey')
+    op.create_table(
+        'likes',
+        sa.Column('post_id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column(
+            'created_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.text('now()'),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('post_id', 'user_id', name='likes_pkey'),
+        postgresql_partition_by='HASH (post_id)',
+    )
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f'CREATE TABLE likes_p{remainder} PARTITION OF likes '
+            f'FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})'
+        )
+    # Copy before the triggers exist; like_count already includes these rows
+    op.execute(
+        'INSERT INTO likes (post_id, user_id, created_at) '
+        'SELECT post_id, user_id, created_at FROM likes_old'
+    )
+    op.drop_table('likes_old')
+    _create_count_triggers()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('likes', 'likes_partitioned')
+    op.execute(
+        'ALTER TABLE likes_partitioned RENAME CONSTRAINT likes_pkey '
+        'TO likes_partitioned_pkey'
+    )
+    op.create_table(
+        'likes',
+        sa.Column('post_id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column(
+            'created_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.text('now()'),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('post_id', 'user_id', name='likes_pkey'),
+    )
+    op.execute(
+        'INSERT INTO likes (post_id, user_id, created_at) '
+        'SELECT post_id, user_id, created_at FROM likes_partitioned'
+    )
+    # Dropping the parent drops its partitions
+    op.drop_table('likes_partitioned')
+    _create_count_triggers()
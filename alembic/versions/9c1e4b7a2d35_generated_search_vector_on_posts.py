@@ -0,0 +1,45 @@
+"""generated_search_vector_on_posts
+
+Revision ID: 9c1e4b7a2d35
+Revises: 32ad799bfe90
+Create Date: 2026-10-15 09:12:44.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1e4b7a2d35'
+down_revision: Union[str, Sequence[str], None] = '32ad799bfe90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR_EXPR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(excerpt, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('idx_posts_search', table_name='posts', postgresql_using='gin')
+    op.drop_column('posts', 'search_vector')
+    op.add_column('posts', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(SEARCH_VECTOR_EXPR, persisted=True),
+        nullable=True,
+    ))
+    op.create_index('idx_posts_search', 'posts', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_posts_search', table_name='posts', postgresql_using='gin')
+    op.drop_column('posts', 'search_vector')
+    op.add_column('posts', sa.Column('search_vector', postgresql.TSVECTOR(), autoincrement=False, nullable=True))
+    op.create_index('idx_posts_search', 'posts', ['search_vector'], unique=False, postgresql_using='gin')
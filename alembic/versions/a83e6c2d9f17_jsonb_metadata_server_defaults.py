@@ -0,0 +1,56 @@
+"""jsonb_metadata_server_defaults
+
+Revision ID: a83e6c2d9f17
+Revises: 5d2f8b6c0e41
+Create Date: 2026-10-15 15:02:18.734105
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83e6c2d9f17'
+down_revision: Union[str, Sequence[str], None] = '5d2f8b6c0e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("UPDATE user_profiles SET user_metadata = '{}'::jsonb WHERE user_metadata IS NULL")
+    op.alter_column(
+        'user_profiles',
+        'user_metadata',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        server_default=sa.text("'{}'::jsonb"),
+        nullable=False,
+    )
+    op.alter_column(
+        'posts',
+        'post_metadata',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        server_default=sa.text("'{}'::jsonb"),
+        existing_nullable=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        'posts',
+        'post_metadata',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        server_default=None,
+        existing_nullable=False,
+    )
+    op.alter_column(
+        'user_profiles',
+        'user_metadata',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        server_default=None,
+        nullable=True,
+    )
@@ -0,0 +1,30 @@
+"""posts_keyset_index
+
+Revision ID: b2d7e5a1c804
+Revises: 4f8a2c9e6b13
+Create Date: 2026-10-15 10:05:52.903417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d7e5a1c804'
+down_revision: Union[str, Sequence[str], None] = '4f8a2c9e6b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_posts_created_at_id', 'posts', ['created_at', 'id'], unique=False)
+    op.drop_index(op.f('ix_posts_created_at'), table_name='posts')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_posts_created_at'), 'posts', ['created_at'], unique=False)
+    op.drop_index('idx_posts_created_at_id', table_name='posts')
@@ -0,0 +1,37 @@
+"""posts_created_at_brin
+
+Revision ID: b4c93e7f0a15
+Revises: 8a1f6d2c9e04
+Create Date: 2026-10-15 17:03:44.671029
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4c93e7f0a15'
+down_revision: Union[str, Sequence[str], None] = '8a1f6d2c9e04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'idx_posts_created_brin',
+        'posts',
+        ['created_at'],
+        unique=False,
+        postgresql_using='brin',
+        postgresql_with={'pages_per_range': 32},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'idx_posts_created_brin', table_name='posts', postgresql_using='brin'
+    )
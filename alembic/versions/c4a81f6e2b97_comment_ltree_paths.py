@@ -0,0 +1,63 @@
+"""comment_ltree_paths
+
+Revision ID: c4a81f6e2b97
+Revises: 7e3c9a1f5d28
+Create Date: 2026-10-15 13:20:06.571942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a81f6e2b97'
+down_revision: Union[str, Sequence[str], None] = '7e3c9a1f5d28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS ltree')
+    op.execute('ALTER TABLE comments ADD COLUMN path ltree')
+
+    # Backfill paths for existing comments, walking down from the roots
+    op.execute("""
+        WITH RECURSIVE tree AS (
+            SELECT id, text2ltree(id::text) AS path
+            FROM comments WHERE parent_id IS NULL
+            UNION ALL
+            SELECT c.id, t.path || text2ltree(c.id::text)
+            FROM comments c JOIN tree t ON c.parent_id = t.id
+        )
+        UPDATE comments SET path = tree.path FROM tree WHERE comments.id = tree.id
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION comments_set_path() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.parent_id IS NULL THEN
+                NEW.path := text2ltree(NEW.id::text);
+            ELSE
+                SELECT path || text2ltree(NEW.id::text) INTO NEW.path
+                FROM comments WHERE id = NEW.parent_id;
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER comments_set_path BEFORE INSERT ON comments
+        FOR EACH ROW EXECUTE FUNCTION comments_set_path()
+    """)
+    op.create_index('idx_comments_path', 'comments', ['path'], unique=False, postgresql_using='gist')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_comments_path', table_name='comments', postgresql_using='gist')
+    op.execute('DROP TRIGGER IF EXISTS comments_set_path ON comments')
+    op.execute('DROP FUNCTION IF EXISTS comments_set_path()')
+    op.drop_column('comments', 'path')
@@ -0,0 +1,38 @@
+"""likes_natural_primary_key
+
+Revision ID: d58c1f3a7b90
+Revises: 0b7d4e9a21c3
+Create Date: 2026-10-15 16:05:33.287461
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd58c1f3a7b90'
+down_revision: Union[str, Sequence[str], None] = '0b7d4e9a21c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rows without both keys could never be looked up or unliked
+    op.execute('DELETE FROM likes WHERE post_id IS NULL OR user_id IS NULL')
+    op.drop_constraint('uq_post_user_like', 'likes', type_='unique')
+    op.drop_constraint('likes_pkey', 'likes', type_='primary')
+    op.drop_column('likes', 'id')
+    op.create_primary_key('likes_pkey', 'likes', ['post_id', 'user_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('likes_pkey', 'likes', type_='primary')
+    op.execute('ALTER TABLE likes ADD COLUMN id BIGSERIAL')
+    op.create_primary_key('likes_pkey', 'likes', ['id'])
+    op.alter_column('likes', 'post_id', existing_type=sa.UUID(), nullable=True)
+    op.alter_column('likes', 'user_id', existing_type=sa.BigInteger(), nullable=True)
+    op.create_unique_constraint('uq_post_user_like', 'likes', ['post_id', 'user_id'])
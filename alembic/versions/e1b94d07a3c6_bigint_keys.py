@@ -0,0 +1,52 @@
+"""bigint_keys
+
+Revision ID: e1b94d07a3c6
+Revises: c4a81f6e2b97
+Create Date: 2026-10-15 14:02:39.884510
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b94d07a3c6'
+down_revision: Union[str, Sequence[str], None] = 'c4a81f6e2b97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column) pairs widened to BIGINT, keys before the columns referencing them
+BIGINT_COLUMNS = [
+    ('users', 'id'),
+    ('user_profiles', 'id'),
+    ('user_profiles', 'user_id'),
+    ('posts', 'author_id'),
+    ('comments', 'id'),
+    ('comments', 'parent_id'),
+    ('comments', 'user_id'),
+    ('likes', 'id'),
+    ('likes', 'user_id'),
+]
+
+# serial sequences are created AS integer and must be widened too
+SEQUENCES = ['users_id_seq', 'user_profiles_id_seq', 'comments_id_seq', 'likes_id_seq']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Each ALTER rewrites its table and indexes from scratch, which already
+    # removes the bloat a separate pg_repack pass would target
+    for table, column in BIGINT_COLUMNS:
+        op.alter_column(table, column, type_=sa.BigInteger(), existing_type=sa.Integer())
+    for sequence in SEQUENCES:
+        op.execute(f'ALTER SEQUENCE {sequence} AS bigint')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for sequence in SEQUENCES:
+        op.execute(f'ALTER SEQUENCE {sequence} AS integer')
+    for table, column in reversed(BIGINT_COLUMNS):
+        op.alter_column(table, column, type_=sa.Integer(), existing_type=sa.BigInteger())
@@ -1,13 +1,19 @@
 from datetime import timedelta
 from typing import Any
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException, status, Body, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import security
 from app.core.config import settings
+from app.core.last_login import record_login
 from app.core.security import get_current_user, get_redis
 from app.crud.user import user_crud
-from app.middleware.rate_limit import api_rate_limit, auth_rate_limit
+from app.middleware.rate_limit import (
+    api_rate_limit,
+    auth_rate_limit,
+    concurrency_limit,
+)
 from app.schemas.user import User, UserCreate, UserWithProfile
 from app.schemas.token import (
     Token,
@@ -19,12 +25,25 @@ from app.schemas.token import (
     PasswordResetRequest,
     PasswordReset,
 )
-from app.database import get_async_db
+from app.database import commit, get_async_db
 import redis.asyncio as redis
 from datetime import datetime, timezone
+import time
 
 router = APIRouter()
 
+# Token lifetimes resolved once at import instead of on every request
+_ACCESS_TTL = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+_ACCESS_TTL_SECONDS = _ACCESS_TTL.total_seconds()
+_REFRESH_TTL = timedelta(days=30)
+_RESET_TTL = timedelta(hours=1)
+
+_TOKEN_PAYLOAD_FIELDS = tuple(TokenPayload.model_fields)
+
+# Parsed payloads per raw token. TokenPayload is frozen, so one instance can
+# be shared; expiry and revocation are checked before every lookup.
+_token_payloads: TTLCache = TTLCache(maxsize=4096, ttl=300)
+
 
 @router.post("/login", response_model=Token)
 @auth_rate_limit()
@@ -59,11 +78,7 @@ async def login(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
         )
 
-    # Update last login
-    await user_crud.update_last_login(db, user_id=int(user.id))
-
     # Create access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
         data={
             "sub": user.email,
@@ -72,24 +87,25 @@ async def login(
             "username": user.username,
             "is_superuser": user.is_superuser,
         },
-        expires_delta=access_token_expires,
+        expires_delta=_ACCESS_TTL,
     )
 
     # create refresh token
     refresh_token = security.create_access_token(data={"sub": user.email})
 
     # calculate expiration datetime
-    exxpires_at = datetime.now(timezone.utc) + access_token_expires
+    exxpires_at = datetime.now(timezone.utc) + _ACCESS_TTL
 
-    # Store refresh token in Redis
-    await redis_client.setex(
-        f"refresh_token:{user.id}", timedelta(days=30), refresh_token
-    )
+    # Store refresh token and queue the last_login update in one round-trip
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.setex(f"refresh_token:{user.id}", _REFRESH_TTL, refresh_token)
+        record_login(pipe, int(user.id))
+        await pipe.execute()
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
         "token_type": "bearer",
-        "expires_in": access_token_expires.total_seconds(),
+        "expires_in": _ACCESS_TTL_SECONDS,
         "exxpires_at": str(exxpires_at),
     }
 
@@ -103,11 +119,13 @@ async def logout(
     """
     Logout user by blacklisting the access token
     """
-    # Add token to blacklisted
-    await security.blacklist_token(token)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        # Add token to blacklisted
+        await security.blacklist_token(token, pipe=pipe)
 
-    # Remove refresh token
-    await redis_client.delete(f"refresh_token:{current_user.id}")
+        # Remove refresh token
+        pipe.delete(f"refresh_token:{current_user.id}")
+        await pipe.execute()
     return {"message": "Successfully logged out"}
 
 
@@ -133,6 +151,7 @@ async def register(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occured. Try again later",
         )
+    await commit(db)
     return {"message": "User created successfully"}
 
 
@@ -146,7 +165,12 @@ async def read_current_user(
     """
     Get current user information with profile.
     """
-    user = await user_crud.get_by_id(db, user_id=current_user.id, include_profile=True)
+    # get_current_user leaves the row here when it had to hit the database
+    user = getattr(request.state, "db_user", None)
+    if user is None:
+        user = await user_crud.get_by_id(
+            db, user_id=current_user.id, include_profile=True
+        )
     return user
 
 
@@ -186,15 +210,17 @@ async def refresh_token(
             detail="User not found or inactive",
         )
 
-    # verify refresh token is still valid (not revoked)
-    stored_token = await redis_client.get(f"refresh_token:{user.id}")
-    if stored_token != token_data.refresh_token:
+    # verify refresh token is still valid (not revoked), in one round-trip
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.get(f"refresh_token:{user.id}")
+        pipe.exists(f"blacklist:{token_data.refresh_token}")
+        stored_token, is_blacklisted = await pipe.execute()
+    if is_blacklisted or stored_token != token_data.refresh_token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token revoked"
         )
 
     # create new tokens
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     new_access_token = security.create_access_token(
         data={
             "sub": user.email,
@@ -203,23 +229,23 @@ async def refresh_token(
             "username": user.username,
             "is_superuser": user.is_superuser,
         },
-        expires_delta=access_token_expires,
+        expires_delta=_ACCESS_TTL,
     )
 
     # Create new refresh token (token rotation)
     new_refresh_token = security.create_refresh_token(data={"sub": user.email})
 
     # Update refresh token in redis (Invalidate old, stored new)
-    await redis_client.delete(f"refresh_token:{user.id}")
-    await redis_client.setex(
-        f"refresh_token:{user.id}", timedelta(days=30), new_refresh_token
-    )
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.delete(f"refresh_token:{user.id}")
+        pipe.setex(f"refresh_token:{user.id}", _REFRESH_TTL, new_refresh_token)
+        await pipe.execute()
 
     return {
         "access_token": new_access_token,
         "refresh_token": new_refresh_token,
         "token_type": "bearer",
-        "expires_in": access_token_expires.total_seconds(),
+        "expires_in": _ACCESS_TTL_SECONDS,
     }
 
 
@@ -235,7 +261,7 @@ async def verify_token(
     """
 
     # Check if token is blackislted
-    is_blacklisted = await redis_client.get(f"blacklisted:{token_data.token}")
+    is_blacklisted = await redis_client.exists(f"blacklist:{token_data.token}")
     if is_blacklisted:
         return TokenVerifyResponse(
             payload=None, valid=False, error="Token has been revoked"
@@ -247,28 +273,24 @@ async def verify_token(
         return TokenVerifyResponse(payload=None, valid=False, error="Invalid token")
 
     # Check if token has expired
-    from datetime import datetime
-
     exp_timestamp = payload.get("exp")
-    if exp_timestamp and datetime.now(timezone.utc).timestamp() > exp_timestamp:
+    if exp_timestamp and time.time() > exp_timestamp:
         return TokenVerifyResponse(payload=None, valid=False, error="Token has expired")
 
-    # Parse payload into TokenPayload scheme
-    token_payload = TokenPayload(
-        sub=payload.get("sub"),
-        exp=payload.get("exp"),
-        iat=payload.get("iat"),
-        type=payload.get("type"),
-        role=payload.get("role"),
-        is_superuser=payload.get("is_superuser"),
-        user_id=payload.get("user_id"),
-        username=payload.get("username"),
-    )
+    # Parse payload into TokenPayload scheme. The signature was already
+    # verified, so skip re-validating our own claims.
+    token_payload = _token_payloads.get(token_data.token)
+    if token_payload is None:
+        token_payload = TokenPayload.model_construct(
+            **{field: payload.get(field) for field in _TOKEN_PAYLOAD_FIELDS}
+        )
+        _token_payloads[token_data.token] = token_payload
     return TokenVerifyResponse(valid=True, payload=token_payload, error="")
 
 
 @router.post("/password/reset-request")
 async def request_password_reset(
+    request: Request,
     reset_data: PasswordResetRequest,
     db: AsyncSession = Depends(get_async_db),
     redis_client: redis.Redis = Depends(get_redis),
@@ -283,27 +305,28 @@ async def request_password_reset(
     4. (In productuion) send email with reset link
     """
 
-    user = await user_crud.get_user_by_email(db, email=reset_data.email)
-    if user:
-        reset_token = security.create_access_token(
-            data={"sub": user.email, "type": "reset", "user_id": user.id},
-            expires_delta=timedelta(hours=1),
-        )
-
-        # Store reset token in redis
-        await redis_client.setex(
-            f"password_reset:{user.id}", timedelta(hours=1), reset_token
-        )
-
-        # In production, send email here
-        # await send_password_reset_email(user.email, reset_token)
-
-        # for demo. lets return token
-        # WARNING: DOnt do this in production
-        return {
-            "message": "If the email exists, a reset link has been sent",
-            "reset_token": reset_token,  # remove this in prod
-        }
+    async with concurrency_limit(request, max_in_flight=2, window_s=30):
+        user = await user_crud.get_user_by_email(db, email=reset_data.email)
+        if user:
+            reset_token = security.create_access_token(
+                data={"sub": user.email, "type": "reset", "user_id": user.id},
+                expires_delta=_RESET_TTL,
+            )
+
+            # Store reset token in redis
+            await redis_client.setex(
+                f"password_reset:{user.id}", _RESET_TTL, reset_token
+            )
+
+            # In production, send email here
+            # await send_password_reset_email(user.email, reset_token)
+
+            # for demo. lets return token
+            # WARNING: DOnt do this in production
+            return {
+                "message": "If the email exists, a reset link has been sent",
+                "reset_token": reset_token,  # remove this in prod
+            }
 
     return {"message": "If the emauil exists, a reset link has been sent"}
 
@@ -350,18 +373,26 @@ async def reset_password(
         )
 
     # Update password
+    # Also drops the cached auth view of the user once committed
     await user_crud.update_password(
-        db, user_id=user_id, new_password=reset_data.new_password
-    )
-
-    # Delete used reset token
-    await redis_client.delete(f"password_reset:{user_id}")
-
-    # Invalidate all existing tokens for this user
-    await redis_client.setex(
-        f"token_invalidate:{user.id}",
-        timedelta(minutes=5),
-        str(datetime.now(timezone.utc)),
+        db,
+        user_id=user_id,
+        new_password=reset_data.new_password,
+        redis_client=redis_client,
     )
+    # Commit before spending the reset token, so a failed commit leaves it usable
+    await commit(db)
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        # Delete used reset token
+        pipe.delete(f"password_reset:{user_id}")
+
+        # Invalidate all existing tokens for this user
+        pipe.setex(
+            f"token_invalidate:{user.id}",
+            timedelta(minutes=5),
+            str(int(time.time())),
+        )
+        await pipe.execute()
 
     return {"message": "Password updated successfully"}
@@ -1,27 +1,78 @@
+from datetime import datetime
 from typing import Any, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
-from fastapi_pagination import Page, paginate, add_pagination
-
-# from fastapi_cache.decorator import cache
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    Query,
+    Path,
+    Request,
+)
+from fastapi.responses import StreamingResponse
+from fastapi_pagination import add_pagination
+from fastapi_pagination.cursor import CursorPage
+from fastapi_pagination.customization import CustomizedPage, UseIncludeTotal
+from fastapi_cache.decorator import cache
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.security import get_current_user, get_current_active_user, require_role
+from app.core.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from app.core.security import (
+    get_current_user,
+    get_current_active_user,
+    require_admin,
+    require_role,
+)
 from app.crud.post import post_crud
 from app.models.user import User
-from app.schemas.post import Post, PostCreate, PostUpdate, PostWithCategories
-from app.database import get_async_db
+from app.schemas.post import (
+    Post,
+    PostCreate,
+    PostInDBBase,
+    PostUpdate,
+    PostWithCategories,
+)
+from app.database import AsyncSessionLocal, commit, get_async_db
+from app.middleware.rate_limit import concurrency_limit
 import redis.asyncio as redis
 from app.core.config import settings
 
 router = APIRouter()
 
+# One page is exactly the rows fetched by keyset; no total, which would
+# need a COUNT over the whole filtered set on every request
+PostCursorPage = CustomizedPage[CursorPage[Post], UseIncludeTotal(False)]
+
+MAX_IMPORT_POSTS = 10_000
+
+
+def _popular_cache_key(func, namespace: str = "", *, request, response, args, kwargs):
+    """Key popular posts on the query only (the default key includes the db session)"""
+    return f"{namespace}:{kwargs['days']}:{kwargs['limit']}"
 
-@router.get("/", response_model=Page[Post])
+
+def _parse_post_cursor(cursor: str, order_by: str) -> tuple[Any, UUID]:
+    """Turn a cursor from next_page back into a (sort value, id) position"""
+    try:
+        value, post_id = decode_cursor(cursor)
+        if order_by == "view_count":
+            value = int(value)
+        else:
+            value = datetime.fromisoformat(value)
+        return value, UUID(post_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+@router.get("/", response_model=PostCursorPage)
 # @cache(expire=60)
 async def read_posts(
     db: AsyncSession = Depends(get_async_db),
-    skip: int = Query(0, gt=0),
-    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     published_only: bool = Query(True),
     author_id: Optional[int] = Query(None),
     category_id: Optional[int] = Query(None),
@@ -42,8 +93,11 @@ async def read_posts(
     - **search**: Search in title and content
     - **order_by**: Field to order by (created_at, updated_at, view_count, published_at)
     - **order_desc**: Order descending (default: True)
+    - **cursor**: Continue after the last row of a previous response, taken
+      from its `next_page` (ignores `skip`)
     """
 
+    after = _parse_post_cursor(cursor, order_by) if cursor else None
     posts = await post_crud.get_multi(
         db,
         skip=skip,
@@ -55,12 +109,72 @@ async def read_posts(
         search=search,
         order_by=order_by,
         order_desc=order_desc,
+        after=after,
     )
-    return paginate(posts)
+
+    # A full page may have more rows behind it. Rows with a NULL sort value
+    # have no keyset position, so no cursor is issued for them.
+    next_page = None
+    if len(posts) == limit:
+        last = posts[-1]
+        last_value = getattr(last, order_by)
+        if last_value is not None:
+            next_page = encode_cursor(last_value, last.id)
+
+    return PostCursorPage(
+        items=[Post.model_validate(post) for post in posts], next_page=next_page
+    )
+
+
+@router.get("/export")
+async def export_posts(
+    current_user: User = Depends(require_admin),
+) -> StreamingResponse:
+    """
+    Stream all published posts as newline-delimited JSON.
+
+    Rows are read in batches from a server-side cursor, so memory use stays
+    flat regardless of table size. Requires admin role.
+    """
+
+    async def lines():
+        async with AsyncSessionLocal() as db:
+            async for post in post_crud.stream_published(db):
+                yield PostInDBBase.model_validate(post).model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/import", status_code=status.HTTP_201_CREATED)
+async def import_posts(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    posts_in: list[PostCreate],
+    current_user: User = Depends(require_admin),
+) -> dict[str, Any]:
+    """
+    Bulk-import posts authored by the calling admin.
+
+    Rows are loaded with COPY rather than one INSERT each. Requires admin role.
+    """
+    if len(posts_in) > MAX_IMPORT_POSTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_IMPORT_POSTS} posts per import",
+        )
+    if not posts_in:
+        return {"imported": 0, "ids": []}
+
+    ids = await post_crud.import_posts(
+        db, posts=posts_in, author_id=int(current_user.id)
+    )
+    await commit(db)
+    return {"imported": len(ids), "ids": ids}
 
 
 @router.get("/search", response_model=list[Post])
 async def search_posts(
+    request: Request,
     q: str = Query(..., min_length=3),
     limit: int = Query(20, ge=1, le=100),
     db: AsyncSession = Depends(get_async_db),
@@ -70,22 +184,25 @@ async def search_posts(
 
     Uses PostgreSQL full-text search capabilities.
     """
-    posts = await post_crud.search_full_text(db, search_query=q, limit=limit)
+    async with concurrency_limit(request, max_in_flight=5, window_s=30):
+        posts = await post_crud.search_full_text(db, search_query=q, limit=limit)
     return posts
 
 
 @router.get("/popular", response_model=list[Post])
-# @cache(expire=300)
+@cache(expire=60, namespace="popular", key_builder=_popular_cache_key)
 async def read_popular_posts(
     days: int = Query(7, ge=1, le=365),
     limit: int = Query(10, ge=1, le=50),
     db: AsyncSession = Depends(get_async_db),
-) -> Any:
+) -> list[Post]:
     """
     Get popular posts from last N days.
+
+    Cached in Redis for 60 seconds per (days, limit).
     """
     posts = await post_crud.get_popular(db, days=days, limit=limit)
-    return posts
+    return [Post.model_validate(post) for post in posts]
 
 
 @router.post("/", response_model=Post, status_code=status.HTTP_201_CREATED)
@@ -101,4 +218,5 @@ async def create_post(
     Requires authentication.
     """
     post = await post_crud.create(db=db, obj_in=post_in, author_id=int(current_user.id))
+    await commit(db)
     return post
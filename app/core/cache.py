@@ -0,0 +1,19 @@
+from typing import Any
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi_cache.coder import Coder
+
+
+class ORJSONCoder(Coder):
+    """
+    fastapi-cache coder backed by orjson. Datetimes and UUIDs are encoded
+    natively; anything else (Pydantic models) goes through jsonable_encoder.
+    """
+
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        return orjson.dumps(value, default=jsonable_encoder)
+
+    @classmethod
+    def decode(cls, value: bytes) -> Any:
+        return orjson.loads(value)
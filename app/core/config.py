@@ -46,9 +46,19 @@ class Settings(BaseSettings):
 
         return data
 
+    # Database connection pool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10  # caps each worker at 20 connections
+    DB_POOL_WARM: int = 5  # connections opened at startup
+    DB_POOL_RECYCLE: int = 1800  # seconds
+    DB_POOL_TIMEOUT: int = 10  # seconds to wait for a free connection
+    DB_STATEMENT_CACHE_SIZE: int = 1024
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 512
+
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_CACHE_TTL: int = 300  # 5 minutes
+    REDIS_MAX_CONNECTIONS: int = 64
 
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
@@ -62,6 +72,8 @@ class Settings(BaseSettings):
     EMAILS_FROM_EMAIL: Optional[str] = None
     EMAILS_FROM_NAME: Optional[str] = None
     ENVIRONMENT: Optional[str] = "development"
+    # Create tables on startup instead of running `alembic upgrade head`
+    AUTO_CREATE_TABLES: bool = False
     BACKEND_CORS_ORIGINS: list[str] = [
         "localhost:3000",
     ]
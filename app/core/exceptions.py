@@ -1,5 +1,5 @@
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from pydantic import ValidationError
 import traceback
 import structlog
@@ -31,7 +31,7 @@ def setup_exception_handlers(app: FastAPI):
                 **exc.extra,
             }
         }
-        return JSONResponse(status_code=exc.status_code, content=error_response)
+        return ORJSONResponse(status_code=exc.status_code, content=error_response)
 
     @app.exception_handler(ValidationError)
     async def validation_exception_handler(request: Request, exc: ValidationError):
@@ -45,7 +45,7 @@ def setup_exception_handlers(app: FastAPI):
                 }
             )
 
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=422,
             content={
                 "error": {
@@ -69,7 +69,7 @@ def setup_exception_handlers(app: FastAPI):
         else:
             detail = "Internal Server error"
 
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": {"code": "INTERNAL_ERROR", "message": detail}},
         )
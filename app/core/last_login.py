@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime, timezone
+import time
+import redis.asyncio as redis
+import structlog
+from app.core.redis_batches import claim_batches, release_batch
+from app.crud.user import user_crud
+from app.database import AsyncSessionLocal
+
+logger = structlog.get_logger()
+
+# Logins are recorded in a Redis sorted set (user_id scored by login time)
+# and written to users.last_login in one batched UPDATE per flush, keeping
+# a COMMIT off the login path
+PENDING_LAST_LOGIN_KEY = "pending_last_login"
+FLUSH_INTERVAL_SECONDS = 10
+
+
+def record_login(pipe: redis.client.Pipeline, user_id: int) -> None:
+    """
+    Queue a last_login update on the given pipeline; the caller executes it.
+    A later login of the same user overwrites the earlier timestamp.
+    """
+    pipe.zadd(PENDING_LAST_LOGIN_KEY, {str(user_id): time.time()})
+
+
+async def flush_last_logins(redis_client: redis.Redis) -> int:
+    """
+    Move pending logins into Postgres. Returns the number of users updated.
+    Batches are claimed per flush (see app.core.redis_batches).
+    """
+    updated = 0
+    for batch_key in await claim_batches(redis_client, PENDING_LAST_LOGIN_KEY):
+        pending = await redis_client.zrange(batch_key, 0, -1, withscores=True)
+        if pending:
+            logins = {
+                int(user_id): datetime.fromtimestamp(ts, timezone.utc)
+                for user_id, ts in pending
+            }
+            async with AsyncSessionLocal() as db:
+                await user_crud.set_last_logins(db, logins)
+                await db.commit()
+
+        await release_batch(redis_client, PENDING_LAST_LOGIN_KEY, batch_key)
+        updated += len(pending)
+    return updated
+
+
+async def run_last_login_flusher(
+    redis_client: redis.Redis, interval: float = FLUSH_INTERVAL_SECONDS
+) -> None:
+    """Background loop started from the app lifespan"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_last_logins(redis_client)
+        except Exception as e:
+            logger.error("last_login_flush_failed", error=str(e))
@@ -0,0 +1,32 @@
+import base64
+from datetime import datetime
+from typing import Any
+import orjson
+
+# Upper bound for any list query, so one request can't make Postgres
+# materialize (and asyncpg buffer) an arbitrarily large result
+MAX_PAGE_SIZE = 200
+
+
+def clamp_limit(limit: int) -> int:
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+def encode_cursor(value: Any, row_id: Any) -> str:
+    """Encode a keyset position (sort value, row id) as an opaque URL-safe token"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = orjson.dumps([value, str(row_id)])
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[Any, str]:
+    """
+    Decode a token produced by encode_cursor.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        value, row_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    return value, row_id
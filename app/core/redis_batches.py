@@ -0,0 +1,68 @@
+import time
+import uuid
+import redis.asyncio as redis
+
+# Buffered writes (e.g. last logins) are flushed by every worker.
+# Each flush claims the buffer by renaming it to a key of its own, so no
+# two workers ever read or delete the same batch. Claimed batch keys are
+# tracked in a sorted set scored by claim time; a batch whose flush failed
+# is re-claimed by one worker once it has been pending for STALE_BATCH_SECONDS.
+STALE_BATCH_SECONDS = 300
+
+# Returns 1 if KEYS[1] existed and was moved to KEYS[2], 0 otherwise
+CLAIM_BATCH_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('RENAME', KEYS[1], KEYS[2])
+redis.call('ZADD', KEYS[3], ARGV[1], KEYS[2])
+return 1
+"""
+
+# Returns batch keys claimed at or before ARGV[2], re-stamped with ARGV[1]
+# so no other worker picks them up while they are retried
+RECLAIM_STALE_LUA = """
+local stale = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[2])
+for _, key in ipairs(stale) do
+    redis.call('ZADD', KEYS[1], ARGV[1], key)
+end
+return stale
+"""
+
+
+def _batches_key(buffer_key: str) -> str:
+    return f"{buffer_key}:batches"
+
+
+async def claim_batches(redis_client: redis.Redis, buffer_key: str) -> list[str]:
+    """
+    Claim the batches this flush owns: stale batches left by failed flushes,
+    then the current buffer under a fresh per-flush key.
+    Pass each one to release_batch once it has been committed.
+    """
+    batches_key = _batches_key(buffer_key)
+    now = time.time()
+
+    reclaim = redis_client.register_script(RECLAIM_STALE_LUA)
+    batch_keys = [
+        key.decode() if isinstance(key, bytes) else key
+        for key in await reclaim(
+            keys=[batches_key], args=[now, now - STALE_BATCH_SECONDS]
+        )
+    ]
+
+    claim = redis_client.register_script(CLAIM_BATCH_LUA)
+    batch_key = f"{buffer_key}:batch:{uuid.uuid4().hex}"
+    if await claim(keys=[buffer_key, batch_key, batches_key], args=[now]):
+        batch_keys.append(batch_key)
+    return batch_keys
+
+
+async def release_batch(
+    redis_client: redis.Redis, buffer_key: str, batch_key: str
+) -> None:
+    """Drop a batch whose contents have been written to the database"""
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(batch_key)
+        pipe.zrem(_batches_key(buffer_key), batch_key)
+        await pipe.execute()
@@ -1,19 +1,33 @@
-from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from functools import lru_cache
 from typing import Optional, Any, Union
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import asyncio
+import hashlib
+import os
+import time
+from cachetools import TTLCache
+import orjson
+import jwt
+from jwt.exceptions import PyJWTError
 from fastapi.security import OAuth2PasswordBearer
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy import Column
 from sqlalchemy.ext.asyncio import AsyncSession
 import redis.asyncio as redis
 from app.core.config import settings
 from app.crud.user import user_crud
 from app.database import get_async_db
-from app.models.user import User
+from app.models.user import User, UserRole
 import bcrypt
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Token settings resolved once at import instead of on every request
+_SECRET = settings.SECRET_KEY
+_ALG = settings.ALGORITHM
+_ALGORITHMS = [_ALG]
+_ACCESS_TTL_SECONDS = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+_REFRESH_TTL_SECONDS = int(timedelta(days=30).total_seconds())
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(
@@ -21,32 +35,105 @@ oauth2_scheme = OAuth2PasswordBearer(
     auto_error=False,  # Allow optional authentication
 )
 
-# redis connection pool
-redis_pool: Optional[redis.Redis] = None
 
+# How long the auth view of a user is cached in Redis
+USER_CACHE_TTL = 60
 
-async def get_redis() -> redis.Redis:
-    global redis_pool
-    if redis_pool is None:
-        redis_pool = await redis.from_url(
-            settings.REDIS_URL, encoding="utf-8", decode_responses=True
-        )
-    return redis_pool
+
+def create_redis_client() -> redis.Redis:
+    """
+    Build the shared Redis client. Called once from the app lifespan.
+    The blocking pool makes bursts wait for a free connection instead of
+    opening new ones past REDIS_MAX_CONNECTIONS.
+    """
+    pool = redis.BlockingConnectionPool.from_url(
+        settings.REDIS_URL,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        health_check_interval=30,
+        encoding="utf-8",
+        decode_responses=True,
+    )
+    return redis.Redis(connection_pool=pool)
+
+
+async def get_redis(request: Request) -> redis.Redis:
+    return request.app.state.redis
 
 
-# def verify_password(plain_password: str, hashed_password: str) -> bool:
-#     return pwd_context.verify(plain_password, hashed_password)
+@dataclass(slots=True)
+class CachedUser:
+    """
+    Minimal view of a user cached in Redis.
+    Carries only the fields the auth dependencies and handlers rely on.
+    """
+
+    id: int
+    email: str
+    username: str
+    role: UserRole
+    is_active: bool
+    is_superuser: bool
+
 
+def user_cache_key(email: str) -> str:
+    return f"user:email:{email}"
 
-# def get_password_hash(password: str) -> str:
-#     return pwd_context.hash(password)
 
+def load_cached_user(cached: Optional[str]) -> Optional[CachedUser]:
+    """Deserialize a cached auth view of a user, if present"""
+    if cached is None:
+        return None
+    data = orjson.loads(cached)
+    data["role"] = UserRole(data["role"])
+    return CachedUser(**data)
+
+
+async def cache_user(redis_client: redis.Redis, user: User) -> CachedUser:
+    """Store the auth view of a user in Redis for USER_CACHE_TTL seconds"""
+    cached = CachedUser(
+        id=user.id,
+        email=user.email,
+        username=user.username,
+        role=user.role,
+        is_active=bool(user.is_active),
+        is_superuser=bool(user.is_superuser),
+    )
+    await redis_client.setex(
+        user_cache_key(cached.email), USER_CACHE_TTL, orjson.dumps(asdict(cached))
+    )
+    return cached
 
-def verify_password(
+
+# bcrypt releases the GIL, so a thread per core runs hashes in parallel
+_bcrypt_pool = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1, thread_name_prefix="bcrypt"
+)
+
+# Recently verified (password, hash) pairs, keyed by a per-process keyed
+# blake2b digest so plaintext passwords are never held in memory
+_verified_passwords: TTLCache = TTLCache(maxsize=1024, ttl=60)
+_PASSWORD_CACHE_KEY = os.urandom(32)
+
+
+def _password_cache_key(plain_password: bytes, hashed_password: bytes) -> bytes:
+    return hashlib.blake2b(
+        plain_password + b"\0" + hashed_password,
+        digest_size=16,
+        key=_PASSWORD_CACHE_KEY,
+    ).digest()
+
+
+def clear_password_cache() -> None:
+    """Drop all cached verifications (call after any password change)."""
+    _verified_passwords.clear()
+
+
+async def verify_password(
     plain_password: Union[str, bytes], hashed_password: Union[str, bytes]
 ) -> bool:
     """
     Verify password using direct bcrypt.
+    bcrypt runs on the bcrypt thread pool so it does not block the event loop.
     """
     # Convert to bytes if strings
     if isinstance(plain_password, str):
@@ -54,23 +141,35 @@ def verify_password(
     if isinstance(hashed_password, str):
         hashed_password = hashed_password.encode("utf-8")
 
+    cache_key = _password_cache_key(plain_password, hashed_password)
+    if cache_key in _verified_passwords:
+        return True
+
+    loop = asyncio.get_running_loop()
     try:
-        return bcrypt.checkpw(plain_password, hashed_password)
+        verified = await loop.run_in_executor(
+            _bcrypt_pool, bcrypt.checkpw, plain_password, hashed_password
+        )
     except Exception as e:
         print(f"Verification error: {e}")
         return False
 
+    if verified:
+        _verified_passwords[cache_key] = True
+    return verified
+
 
-def get_password_hash(password: Union[str, bytes]) -> str:
+async def get_password_hash(password: Union[str, bytes]) -> str:
     """
-    Generate password hash using direct bcrypt.
+    Generate password hash using direct bcrypt, on the bcrypt thread pool.
     """
     if isinstance(password, str):
         password = password.encode("utf-8")
 
     # Generate salt and hash
     salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password, salt)
+    loop = asyncio.get_running_loop()
+    hashed = await loop.run_in_executor(_bcrypt_pool, bcrypt.hashpw, password, salt)
 
     # Return as string
     return hashed.decode("utf-8")
@@ -80,58 +179,63 @@ def create_access_token(
     data: dict[str, Any], expires_delta: Optional[timedelta] = None
 ):
     to_encode = data.copy()
+    now = int(time.time())
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        ttl = int(expires_delta.total_seconds())
     else:
-        expire = datetime.now(timezone.utc) + timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-        )
+        ttl = _ACCESS_TTL_SECONDS
 
-    to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
-    )
+    to_encode.update({"exp": now + ttl, "iat": now, "type": "access"})
+    encoded_jwt = jwt.encode(to_encode, _SECRET, algorithm=_ALG)
     return encoded_jwt
 
 
 def create_refresh_token(data: dict[str, Any]) -> str:
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(days=30)  # 30 days expiry
-
-    to_encode.update({"exp": expire, "type": "refresh"})
+    now = int(time.time())
 
-    encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
+    to_encode.update(
+        {"exp": now + _REFRESH_TTL_SECONDS, "iat": now, "type": "refresh"}
     )
+
+    encoded_jwt = jwt.encode(to_encode, _SECRET, algorithm=_ALG)
     return encoded_jwt
 
 
+@lru_cache(maxsize=8192)
+def _decode_jwt(token: str) -> dict[str, Any]:
+    """
+    Decode and verify a JWT signature, memoized per raw token.
+    Only successful decodes are cached; PyJWTError propagates uncached.
+    """
+    return jwt.decode(
+        token, _SECRET, algorithms=_ALGORITHMS, options={"require": ["exp"]}
+    )
+
+
 async def verify_token(token: str) -> Optional[dict[str, Any]]:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        return payload
-    except JWTError:
+        payload = _decode_jwt(token)
+    except PyJWTError:
+        return None
+
+    # Cached entries skip PyJWT's exp check, so re-check it here
+    exp = payload.get("exp")
+    if exp is not None and exp <= time.time():
         return None
+    return dict(payload)
 
 
 async def get_current_user(
+    request: Request,
     token: Optional[str] = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_async_db),
     redis_client: redis.Redis = Depends(get_redis),
-) -> Optional[User]:
+) -> Optional[CachedUser]:
     if token is None:
         return None
 
-    is_blacklisted = await redis_client.get(f"blacklist:{token}")
-    if is_blacklisted:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked"
-        )
-    print("token ==================", token)
     payload = await verify_token(token)
-    print("payload ==================", payload)
     if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -146,16 +250,35 @@ async def get_current_user(
             detail="Could not validate credential",
         )
 
-    user = await user_crud.get_user_by_email(db, email=email)
-    if user is None:
+    # Blacklist check and user cache lookup in one round-trip
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.exists(f"blacklist:{token}")
+        pipe.get(user_cache_key(email))
+        is_blacklisted, cached = await pipe.execute()
+
+    if is_blacklisted:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked"
         )
 
+    user = load_cached_user(cached)
+    if user is None:
+        # Profile is joined in the same SELECT so /me can reuse this row
+        db_user = await user_crud.get_user_by_email(
+            db, email=email, include_profile=True
+        )
+        if db_user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
+        request.state.db_user = db_user
+        user = await cache_user(redis_client, db_user)
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive User"
         )
+    request.state.user = user
     return user
 
 
@@ -186,6 +309,7 @@ def require_role(required_role: str):
     Factory function to create role-based dependency.
     Returns a sync function that FastAPI can use.
     """
+    allowed_roles = frozenset({required_role, "admin"})
 
     async def role_checker(current_user: Any = Depends(get_current_user)) -> Any:
         if not current_user:
@@ -195,12 +319,13 @@ def require_role(required_role: str):
             )
 
         # Check if user has required role or is admin
-        if not hasattr(current_user, "role"):
+        role = getattr(current_user, "role", None)
+        if role is None:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="User role not defined"
             )
 
-        if current_user.role not in [required_role, "admin"]:
+        if role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Requires {required_role} role or higher",
@@ -216,14 +341,13 @@ require_moderator = require_role("moderator")
 require_admin = require_role("admin")
 
 
-async def blacklist_token(token: str) -> None:
-    """Add token to blacklist (for logout)"""
-    redis_client = await get_redis()
+async def blacklist_token(token: str, pipe: redis.client.Pipeline) -> None:
+    """
+    Add token to blacklist (for logout).
+    The SETEX is queued on the given pipeline; the caller executes it.
+    """
     payload = await verify_token(token)
     if payload and "exp" in payload:
-        expire_at = payload["exp"]
-        # ttl = expire_at - int(datetime.now(timezone.utc))
-        time_diff = expire_at - datetime.now(timezone.utc)
-        ttl = int(time_diff.total_seconds())
+        ttl = payload["exp"] - int(time.time())
         if ttl > 0:
-            await redis_client.setex(f"blacklist:{token}", ttl, "1")
+            pipe.setex(f"blacklist:{token}", ttl, "1")
@@ -1,18 +1,116 @@
-from typing import Optional, List, Dict, Any, Sequence
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional, List, Dict, Any, Sequence
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import Row, select, update, delete, func, and_, or_
-from sqlalchemy.orm import selectinload, joinedload
-from sqlalchemy.dialects.postgresql import array_agg
-from app.models.post import Category, Post, Comment, Like
+from sqlalchemy import (
+    Integer,
+    Row,
+    String,
+    bindparam,
+    select,
+    update,
+    delete,
+    func,
+    and_,
+    or_,
+    true,
+    tuple_,
+    values,
+    column,
+    literal,
+)
+from sqlalchemy.orm import noload, selectinload, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.dialects.postgresql import (
+    UUID as PG_UUID,
+    array_agg,
+    insert as pg_insert,
+)
+from fastapi_cache import FastAPICache
+from app.core.pagination import clamp_limit
+from app.database import on_commit
+from app.models.post import (
+    Category,
+    Post,
+    Comment,
+    Like,
+    Tag,
+    post_categories,
+    post_tags,
+    uuid7,
+)
 from app.models.user import User
-from app.schemas.post import PostCreate, PostUpdate
+from app.schemas.post import Post as PostSchema, PostCreate, PostUpdate
+import orjson
 import slugify
 
+POST_CACHE_TTL = 60
+STATS_CACHE_TTL = 300
+
+# Below this many rows a batched INSERT is as fast as COPY
+COPY_MIN_ROWS = 1000
+
+
+def post_slug_cache_key(slug: str) -> str:
+    return f"post:slug:{slug}"
+
+
+def post_stats_cache_key(author_id: Optional[int]) -> str:
+    return f"post:stats:{author_id or 'all'}"
+
+
+def clear_cache_on_commit(db: AsyncSession, keys: set[str]) -> None:
+    """
+    Drop cache entries once the session commits; clearing any earlier would
+    let a concurrent reader re-cache the old row before the change is visible.
+    """
+    if not keys:
+        return
+
+    async def clear() -> None:
+        backend = FastAPICache.get_backend()
+        for key in keys:
+            await backend.clear(key=key)
+
+    on_commit(db, clear)
+
+
+# Built once so every call sends byte-identical SQL, which asyncpg's
+# prepared statement cache can match and skip re-parsing/planning.
+# search_vector @@ tsquery is the form idx_posts_search (GIN) serves.
+_SEARCH_TSQUERY = func.plainto_tsquery("english", bindparam("query", type_=String))
+_SEARCH_RANK = func.ts_rank(Post.search_vector, _SEARCH_TSQUERY).label("rank")
+_SEARCH_STMT = (
+    select(Post.id, Post.title, Post.excerpt, Post.slug, Post.author_id, _SEARCH_RANK)
+    .where(Post.search_vector.op("@@")(_SEARCH_TSQUERY))
+    .where(Post.published == true())
+    .order_by(_SEARCH_RANK.desc())
+    .limit(bindparam("limit", type_=Integer))
+)
+
+# Column order of the records import_posts COPYs into posts. Everything
+# else (created_at, post_metadata, search_vector) is filled by Postgres.
+_IMPORT_COLUMNS = [
+    "id",
+    "title",
+    "slug",
+    "content",
+    "excerpt",
+    "published",
+    "published_at",
+    "view_count",
+    "like_count",
+    "comment_count",
+    "author_id",
+]
+
 
 class PostCRUD:
     """
     CRUD operations for Post model with PostgreSQL-specific features.
+
+    Methods take part in the caller's transaction and never commit;
+    write handlers commit with app.database.commit before returning.
     """
 
     @staticmethod
@@ -26,15 +124,14 @@ class PostCRUD:
         """Get post by ID with optional relationships"""
         query = select(Post).where(Post.id == post_id)
 
-        # Eager loading based on options
+        # Eager loading based on options: joinedload for to-one relationships
+        # (same query), selectinload for collections (one extra IN query)
         if include_author:
-            query = query.options(selectinload(Post.author))
+            query = query.options(joinedload(Post.author))
         if include_categories:
             query = query.options(selectinload(Post.categories))
         if include_comments:
-            query = query.options(
-                selectinload(Post.comments).selectinload(Comment.user)
-            )
+            query = query.options(selectinload(Post.comments).joinedload(Comment.user))
 
         result = await db.execute(query)
         return result.scalar_one_or_none()
@@ -42,11 +139,88 @@ class PostCRUD:
     @staticmethod
     async def get_by_slug(db: AsyncSession, slug: str) -> Optional[Post]:
         """Get post by slug"""
-        query = select(Post).where(Post.slug == slug).options(selectinload(Post.author))
+        query = select(Post).where(Post.slug == slug).options(joinedload(Post.author))
 
         result = await db.execute(query)
         return result.scalar_one_or_none()
 
+    @staticmethod
+    async def get_by_slug_cached(db: AsyncSession, slug: str) -> Optional[PostSchema]:
+        """Get post by slug as its API schema, served from Redis when cached"""
+        backend = FastAPICache.get_backend()
+        key = post_slug_cache_key(slug)
+
+        cached = await backend.get(key)
+        if cached:
+            return PostSchema.model_validate_json(cached)
+
+        db_obj = await PostCRUD.get_by_slug(db, slug)
+        if db_obj is None:
+            return None
+
+        post = PostSchema.model_validate(db_obj)
+        await backend.set(key, post.model_dump_json().encode(), expire=POST_CACHE_TTL)
+        return post
+
+    @staticmethod
+    async def get_free_slug(
+        db: AsyncSession, slug: str, exclude_id: Optional[UUID] = None
+    ) -> str:
+        """
+        Return `slug` if unused, otherwise `slug-N` with the next free suffix.
+        Existing `slug` / `slug-N` rows are fetched in a single query.
+        """
+        query = select(Post.slug).where(
+            or_(Post.slug == slug, Post.slug.regexp_match(f"^{slug}-[0-9]+$"))
+        )
+        if exclude_id is not None:
+            query = query.where(Post.id != exclude_id)
+
+        result = await db.execute(query)
+        taken = set(result.scalars().all())
+        if slug not in taken:
+            return slug
+
+        suffixes = [int(s[len(slug) + 1 :]) for s in taken if s != slug]
+        return f"{slug}-{max(suffixes, default=0) + 1}"
+
+    @staticmethod
+    async def get_free_slugs(db: AsyncSession, slugs: List[str]) -> List[str]:
+        """
+        Batch form of get_free_slug: taken `slug` / `slug-N` rows for every
+        slug are fetched in one query, and repeats within `slugs` get
+        distinct suffixes too.
+        """
+        bases = set(slugs)
+        result = await db.execute(
+            select(Post.slug).where(
+                or_(
+                    Post.slug.in_(bases),
+                    func.regexp_replace(Post.slug, "-[0-9]+$", "").in_(bases),
+                )
+            )
+        )
+        taken = set(result.scalars().all())
+
+        free = []
+        next_suffix: Dict[str, int] = {}
+        for slug in slugs:
+            candidate = slug
+            if candidate in taken:
+                if slug not in next_suffix:
+                    suffixes = [
+                        int(s[len(slug) + 1 :])
+                        for s in taken
+                        if s.startswith(f"{slug}-") and s[len(slug) + 1 :].isdigit()
+                    ]
+                    next_suffix[slug] = max(suffixes, default=0) + 1
+                while candidate in taken:
+                    candidate = f"{slug}-{next_suffix[slug]}"
+                    next_suffix[slug] += 1
+            taken.add(candidate)
+            free.append(candidate)
+        return free
+
     @staticmethod
     async def get_multi(
         db: AsyncSession,
@@ -60,13 +234,20 @@ class PostCRUD:
         search: Optional[str] = None,
         order_by: str = "created_at",
         order_desc: bool = True,
+        after: Optional[tuple[Any, UUID]] = None,
     ) -> List[Post] | Sequence[Post]:
-        """Get multiple posts with advanced filtering"""
-        query = select(Post).options(selectinload(Post.author))
+        """
+        Get multiple posts with advanced filtering.
+
+        When `after` is given as (order_by value, id) of the last row seen,
+        rows are fetched by keyset from that position and `skip` is ignored.
+        """
+        limit = clamp_limit(limit)
+        query = select(Post).options(joinedload(Post.author))
 
         # Apply filters
         if published_only:
-            query = query.where(Post.published.is_(True))
+            query = query.where(Post.published == true())
 
         if author_id:
             query = query.where(Post.author_id == author_id)
@@ -75,7 +256,7 @@ class PostCRUD:
             query = query.join(Post.categories).where(Category.id == category_id)
 
         if tag:
-            query = query.where(Post.tags.contains([tag]))
+            query = query.where(Post.tag_objects.any(Tag.name == tag))
 
         if search:
             search_conditions = or_(
@@ -85,32 +266,58 @@ class PostCRUD:
             )
             query = query.where(search_conditions)
 
-        # Apply ordering
+        # Apply ordering, with id as tiebreaker so keyset positions are unique
         order_column = getattr(Post, order_by, Post.created_at)
         if order_desc:
-            query = query.order_by(order_column.desc())
+            query = query.order_by(order_column.desc(), Post.id.desc())
         else:
-            query = query.order_by(order_column.asc())
+            query = query.order_by(order_column.asc(), Post.id.asc())
 
         # Apply pagination
-        query = query.offset(skip).limit(limit)
+        if after is not None:
+            position = tuple_(order_column, Post.id)
+            if order_desc:
+                query = query.where(position < tuple_(*after))
+            else:
+                query = query.where(position > tuple_(*after))
+        else:
+            query = query.offset(skip)
+        query = query.limit(limit)
 
         result = await db.execute(query)
         return result.scalars().all()
 
+    @staticmethod
+    async def stream_published(
+        db: AsyncSession, batch_size: int = 500
+    ) -> AsyncIterator[Post]:
+        """
+        Yield every published post, oldest first, fetching `batch_size` rows
+        at a time from a server-side cursor instead of buffering the result.
+        Only tags are loaded (one IN query per batch); author and categories
+        are not.
+        """
+        query = (
+            select(Post)
+            .where(Post.published == true())
+            .order_by(Post.created_at, Post.id)
+            .options(
+                noload(Post.author),
+                noload(Post.categories),
+                selectinload(Post.tag_objects),
+            )
+            .execution_options(yield_per=batch_size)
+        )
+        result = await db.stream_scalars(query)
+        async for post in result:
+            yield post
+
     @staticmethod
     async def create(db: AsyncSession, *, obj_in: PostCreate, author_id: int) -> Post:
         """Create new post"""
 
-        # Generate slug from title
-        slug = slugify.slugify(obj_in.title)
-
-        # Check for duplicate slug
-        counter = 1
-        original_slug = slug
-        while await PostCRUD.get_by_slug(db, slug):
-            slug = f"{original_slug}-{counter}"
-            counter += 1
+        # Generate a unique slug from title
+        slug = await PostCRUD.get_free_slug(db, slugify.slugify(obj_in.title))
 
         # Create post instance
         db_obj = Post(
@@ -119,17 +326,9 @@ class PostCRUD:
             content=obj_in.content,
             excerpt=obj_in.excerpt,
             published=obj_in.published,
-            tags=obj_in.tags,
             author_id=author_id,
         )
 
-        # Add categories if provided
-        if obj_in.category_ids:
-            categories = await db.execute(
-                select(Category).where(Category.id.in_(obj_in.category_ids))
-            )
-            db_obj.categories = categories.scalars().all()
-
         # Set published_at if publishing
         if obj_in.published:
             from datetime import datetime, timezone
@@ -137,36 +336,216 @@ class PostCRUD:
             db_obj.published_at = datetime.now(timezone.utc)  # type: ignore[assignment]
 
         db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        await db.flush()
+
+        # Add categories and tags if provided
+        if obj_in.category_ids:
+            await PostCRUD.set_categories(db, db_obj.id, obj_in.category_ids)
+            await db.refresh(db_obj, attribute_names=["categories"])
+        if obj_in.tags:
+            await PostCRUD.set_tags(db, db_obj.id, obj_in.tags)
+            await db.refresh(db_obj, attribute_names=["tag_objects"])
+        else:
+            set_committed_value(db_obj, "tag_objects", [])
+
+        if obj_in.published:
+            clear_cache_on_commit(
+                db, {post_stats_cache_key(None), post_stats_cache_key(author_id)}
+            )
 
         return db_obj
 
+    @staticmethod
+    async def import_posts(
+        db: AsyncSession, *, posts: List[PostCreate], author_id: int
+    ) -> List[UUID]:
+        """
+        Bulk-load posts with COPY on the session's connection, skipping the
+        ORM and per-row INSERT parsing; smaller batches use a multi-row
+        INSERT instead. Runs in the session's transaction;
+        category links are then written in one statement, ignoring unknown
+        category ids like set_categories does.
+        """
+        # Also starts the transaction the COPY below joins
+        slugs = await PostCRUD.get_free_slugs(
+            db, [slugify.slugify(post.title) for post in posts]
+        )
+
+        now = datetime.now(timezone.utc)
+        ids = [uuid7() for _ in posts]
+        records = [
+            (
+                post_id,
+                post.title,
+                slug,
+                post.content,
+                post.excerpt,
+                post.published,
+                now if post.published else None,
+                0,
+                0,
+                0,
+                author_id,
+            )
+            for post_id, post, slug in zip(ids, posts, slugs)
+        ]
+        if len(records) < COPY_MIN_ROWS:
+            # Multi-row INSERT ... VALUES (insertmanyvalues), one statement
+            # per insertmanyvalues_page_size rows
+            await db.execute(
+                pg_insert(Post), [dict(zip(_IMPORT_COLUMNS, r)) for r in records]
+            )
+        else:
+            conn = await db.connection()
+            raw_conn = await conn.get_raw_connection()
+            await raw_conn.driver_connection.copy_records_to_table(
+                "posts", records=records, columns=_IMPORT_COLUMNS
+            )
+
+        links = [
+            (post_id, category_id)
+            for post_id, post in zip(ids, posts)
+            for category_id in post.category_ids or []
+        ]
+        if links:
+            rows = values(
+                column("post_id", PG_UUID(as_uuid=True)),
+                column("category_id", PG_UUID(as_uuid=True)),
+                name="links",
+            ).data(links)
+            await db.execute(
+                pg_insert(post_categories)
+                .from_select(
+                    ["post_id", "category_id"],
+                    select(rows.c.post_id, Category.id).join(
+                        rows, Category.id == rows.c.category_id
+                    ),
+                )
+                .on_conflict_do_nothing(index_elements=["post_id", "category_id"])
+            )
+
+        tag_links = [
+            (post_id, name) for post_id, post in zip(ids, posts) for name in post.tags
+        ]
+        if tag_links:
+            await PostCRUD.ensure_tags(db, [name for _, name in tag_links])
+            rows = values(
+                column("post_id", PG_UUID(as_uuid=True)),
+                column("name", String),
+                name="tag_links",
+            ).data(tag_links)
+            await db.execute(
+                pg_insert(post_tags)
+                .from_select(
+                    ["post_id", "tag_id"],
+                    select(rows.c.post_id, Tag.id).join(rows, Tag.name == rows.c.name),
+                )
+                .on_conflict_do_nothing(index_elements=["post_id", "tag_id"])
+            )
+
+        return ids
+
+    @staticmethod
+    async def ensure_tags(db: AsyncSession, names: List[str]) -> None:
+        """
+        Create any of `names` that don't exist yet. Existing names are
+        filtered out before the INSERT so they don't burn sequence
+        values; ON CONFLICT only covers concurrent inserts.
+        """
+        rows = values(column("name", String), name="names").data(
+            [(name,) for name in sorted(set(names))]
+        )
+        await db.execute(
+            pg_insert(Tag)
+            .from_select(
+                ["name"],
+                select(rows.c.name).where(
+                    ~select(Tag.id).where(Tag.name == rows.c.name).exists()
+                ),
+            )
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+
+    @staticmethod
+    async def set_tags(db: AsyncSession, post_id: UUID, names: List[str]) -> None:
+        """
+        Make `names` the post's tags, creating missing tags. Works like
+        set_categories: unlisted links are deleted, new ones inserted.
+        """
+        await db.execute(
+            delete(post_tags).where(
+                post_tags.c.post_id == post_id,
+                post_tags.c.tag_id.not_in(select(Tag.id).where(Tag.name.in_(names))),
+            )
+        )
+        if not names:
+            return
+        await PostCRUD.ensure_tags(db, names)
+        await db.execute(
+            pg_insert(post_tags)
+            .from_select(
+                ["post_id", "tag_id"],
+                select(literal(post_id, PG_UUID(as_uuid=True)), Tag.id).where(
+                    Tag.name.in_(names)
+                ),
+            )
+            .on_conflict_do_nothing(index_elements=["post_id", "tag_id"])
+        )
+
+    @staticmethod
+    async def set_categories(
+        db: AsyncSession, post_id: UUID, category_ids: List[UUID]
+    ) -> None:
+        """
+        Make `category_ids` the post's categories by writing post_categories
+        directly: unlisted links are deleted, new ones inserted, and links
+        that already exist are left untouched. Unknown ids are ignored.
+        """
+        await db.execute(
+            delete(post_categories).where(
+                post_categories.c.post_id == post_id,
+                post_categories.c.category_id.not_in(category_ids),
+            )
+        )
+        if not category_ids:
+            return
+        await db.execute(
+            pg_insert(post_categories)
+            .from_select(
+                ["post_id", "category_id"],
+                select(literal(post_id, PG_UUID(as_uuid=True)), Category.id).where(
+                    Category.id.in_(category_ids)
+                ),
+            )
+            .on_conflict_do_nothing(index_elements=["post_id", "category_id"])
+        )
+
     @staticmethod
     async def update(db: AsyncSession, *, db_obj: Post, obj_in: PostUpdate) -> Post:
         """Update post"""
         update_data = obj_in.model_dump(exclude_unset=True)
 
+        old_slug = db_obj.slug
+        old_published = bool(db_obj.published)
+        old_author_id = db_obj.author_id
+
         # Update slug if title changed
         if "title" in update_data:
-            new_slug = slugify.slugify(update_data["title"])
-
-            # Check for duplicate slug
-            counter = 1
-            original_slug = new_slug
-            while await PostCRUD.get_by_slug(db, new_slug):
-                new_slug = f"{original_slug}-{counter}"
-                counter += 1
-
-            update_data["slug"] = new_slug
+            update_data["slug"] = await PostCRUD.get_free_slug(
+                db, slugify.slugify(update_data["title"]), exclude_id=db_obj.id
+            )
 
         # Handle categories update
-        if "category_ids" in update_data:
-            categories = await db.execute(
-                select(Category).where(Category.id.in_(update_data["category_ids"]))
+        categories_changed = "category_ids" in update_data
+        if categories_changed:
+            await PostCRUD.set_categories(
+                db, db_obj.id, update_data.pop("category_ids") or []
             )
-            db_obj.categories = categories.scalars().all()
-            del update_data["category_ids"]
+
+        # Handle tags update
+        tags_changed = "tags" in update_data
+        if tags_changed:
+            await PostCRUD.set_tags(db, db_obj.id, update_data.pop("tags") or [])
 
         # Set published_at if publishing for the first time
         if (
@@ -183,41 +562,78 @@ class PostCRUD:
             setattr(db_obj, field, value)
 
         db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        await db.flush()
+        if categories_changed:
+            await db.refresh(db_obj, attribute_names=["categories"])
+        if tags_changed:
+            await db.refresh(db_obj, attribute_names=["tag_objects"])
+
+        # Cached copies under the old and new slug, and the statistics of
+        # every author whose published posts changed
+        stale_keys = {post_slug_cache_key(old_slug), post_slug_cache_key(db_obj.slug)}
+        if old_published != bool(db_obj.published) or old_author_id != db_obj.author_id:
+            stale_keys |= {
+                post_stats_cache_key(None),
+                post_stats_cache_key(old_author_id),
+                post_stats_cache_key(db_obj.author_id),
+            }
+        clear_cache_on_commit(db, stale_keys)
 
         return db_obj
 
     @staticmethod
-    async def increment_view_count(db: AsyncSession, post_id: UUID) -> None:
-        """Increment post view count atomically"""
+    async def get_comment_thread(
+        db: AsyncSession, post_id: UUID, root: Optional[Comment] = None
+    ) -> List[Comment]:
+        """
+        Load a post's comments (or only `root` and its descendants) in one
+        query and return the top-level ones with `replies` filled in.
+        Ordering by path puts every parent before its replies, so the tree
+        is assembled in a single pass.
+        """
+        query = (
+            select(Comment)
+            .where(Comment.post_id == post_id)
+            .order_by(Comment.path)
+            .options(joinedload(Comment.user))
+        )
+        if root is not None:
+            query = query.where(Comment.path.op("<@")(root.path))
+
+        result = await db.execute(query)
+        comments = result.scalars().all()
+
+        replies: Dict[int, List[Comment]] = {c.id: [] for c in comments}
+        top_level = []
+        for comment in comments:
+            if comment.parent_id in replies:
+                replies[comment.parent_id].append(comment)
+            else:
+                top_level.append(comment)
+        for comment in comments:
+            set_committed_value(comment, "replies", replies[comment.id])
+        return top_level
+
+    @staticmethod
+    async def increment_view_count(db: AsyncSession, post_id: UUID) -> Optional[int]:
+        """Increment post view count atomically and return the new count"""
         query = (
             update(Post)
             .where(Post.id == post_id)
             .values(view_count=Post.view_count + 1)
+            .returning(Post.view_count)
         )
-        await db.execute(query)
-        await db.commit()
+        result = await db.execute(query)
+        return result.scalar_one_or_none()
 
     @staticmethod
     async def search_full_text(
         db: AsyncSession, search_query: str, limit: int = 20
     ) -> List[Post] | Sequence[Row[Any]]:
         """Full-text search using PostgreSQL tsvector"""
-        from sqlalchemy import text
-
-        # Using PostgreSQL full-text search
-        query = text("""
-            SELECT id, title, excerpt, slug, author_id,
-                   ts_rank(search_vector, plainto_tsquery(:query)) as rank
-            FROM posts
-            WHERE search_vector @@ plainto_tsquery(:query)
-            AND published = true
-            ORDER BY rank DESC
-            LIMIT :limit
-        """)
-
-        result = await db.execute(query, {"query": search_query, "limit": limit})
+        result = await db.execute(
+            _SEARCH_STMT, {"query": search_query, "limit": clamp_limit(limit)}
+        )
 
         return result.fetchall()
 
@@ -232,11 +648,11 @@ class PostCRUD:
 
         query = (
             select(Post)
-            .where(Post.published.is_(True))
+            .where(Post.published == true())
             .where(Post.created_at >= cutoff_date)
             .order_by(Post.view_count.desc())
-            .limit(limit)
-            .options(selectinload(Post.author))
+            .limit(clamp_limit(limit))
+            .options(joinedload(Post.author))
         )
 
         result = await db.execute(query)
@@ -246,13 +662,23 @@ class PostCRUD:
     async def get_statistics(
         db: AsyncSession, author_id: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Get post statistics"""
+        """Get post statistics, cached for STATS_CACHE_TTL seconds"""
+        backend = FastAPICache.get_backend()
+        key = post_stats_cache_key(author_id)
+
+        cached = await backend.get(key)
+        if cached:
+            return orjson.loads(cached)
+
         query = select(
-            func.count(Post.id).label("total_posts"),
+            func.count().label("total_posts"),
             func.sum(Post.view_count).label("total_views"),
             func.avg(Post.view_count).label("avg_views"),
             func.max(Post.view_count).label("max_views"),
-        ).where(Post.published.is_(True))
+        )
+        # "= true" rather than IS TRUE, so the planner can prove the
+        # idx_posts_published_stats predicate and use the partial index
+        query = query.where(Post.published == true())
 
         if author_id:
             query = query.where(Post.author_id == author_id)
@@ -260,12 +686,14 @@ class PostCRUD:
         result = await db.execute(query)
         stats = result.one()
 
-        return {
+        statistics = {
             "total_posts": stats.total_posts or 0,
             "total_views": stats.total_views or 0,
             "avg_views": float(stats.avg_views or 0),
             "max_views": stats.max_views or 0,
         }
+        await backend.set(key, orjson.dumps(statistics), expire=STATS_CACHE_TTL)
+        return statistics
 
 
 # Create singleton instance
@@ -1,17 +1,36 @@
 from typing import Optional, Any, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, func, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Row,
+    column,
+    select,
+    update,
+    func,
+    or_,
+    values,
+)
+from sqlalchemy.orm import joinedload
+import redis.asyncio as redis
+from app.core.pagination import clamp_limit
+from app.database import on_commit
 from app.models.post import Comment, Post
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
 from datetime import datetime, timezone
 
+# Filterable columns for get_count, resolved once instead of per call
+_USER_FILTER_COLS = {c.key: c for c in User.__table__.columns}
+
 
 class UserCRUD:
     """
     CRUD opeerations for User mode with async support.
     Uses SQLAlachemy 2.0 ASYNC API
+
+    Methods take part in the caller's transaction and never commit;
+    write handlers commit with app.database.commit before returning.
     """
 
     @staticmethod
@@ -21,7 +40,7 @@ class UserCRUD:
         query = select(User).where(User.id == user_id)
 
         if include_profile:
-            query = query.options(selectinload(User.profile))
+            query = query.options(joinedload(User.profile))
 
         result = await db.execute(query)
         return result.scalar_one_or_none()
@@ -33,7 +52,7 @@ class UserCRUD:
         query = select(User).where(User.username == username)
 
         if include_profile:
-            query = query.options(selectinload(User.profile))
+            query = query.options(joinedload(User.profile))
 
         result = await db.execute(query)
         return result.scalar_one_or_none()
@@ -45,7 +64,7 @@ class UserCRUD:
         query = select(User).where(User.email == email)
 
         if include_profile:
-            query = query.options(selectinload(User.profile))
+            query = query.options(joinedload(User.profile))
 
         result = await db.execute(query)
         return result.scalar_one_or_none()
@@ -59,8 +78,15 @@ class UserCRUD:
         search: Optional[str] = None,
         role: Optional[UserRole] = None,
         is_active: Optional[bool] = None,
+        after: Optional[int] = None,
     ) -> list[User] | Sequence[User]:
-        """Get multiple users with filtering"""
+        """
+        Get multiple users with filtering, ordered by id.
+
+        When `after` is the id of the last user seen, rows are fetched by
+        keyset from that position and `skip` is ignored.
+        """
+        limit = clamp_limit(limit)
         query = select(User)
 
         # Apply filters
@@ -79,7 +105,12 @@ class UserCRUD:
             query = query.where(User.is_active == is_active)
 
         # Apply pagination
-        query = query.offset(skip).limit(limit)
+        query = query.order_by(User.id)
+        if after is not None:
+            query = query.where(User.id > after)
+        else:
+            query = query.offset(skip)
+        query = query.limit(limit)
 
         result = await db.execute(query)
         return result.scalars().all()
@@ -89,11 +120,11 @@ class UserCRUD:
         """Get count of users matching filters"""
         query = select(func.count(User.id))
 
-        # Apply filters
-        if filters:
-            for key, value in filters.items():
-                if hasattr(User, key):
-                    query = query.where(getattr(User, key) == value)
+        # Apply filters; unknown names are ignored
+        for key, value in filters.items():
+            col = _USER_FILTER_COLS.get(key)
+            if col is not None:
+                query = query.where(col == value)
 
         result = await db.execute(query)
         return result.scalar()
@@ -104,7 +135,7 @@ class UserCRUD:
 
         """Create new user"""
         # Hash password
-        hashed_password = get_password_hash(obj_in.password)
+        hashed_password = await get_password_hash(obj_in.password)
 
         # Create user instance
         db_obj = User(
@@ -118,62 +149,85 @@ class UserCRUD:
 
         # Add to session
         db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        await db.flush()
 
         return db_obj
 
     @staticmethod
     async def update(db: AsyncSession, *, db_obj: User, obj_in: UserUpdate) -> User:
-        from app.core.security import get_password_hash, verify_password
+        from app.core.security import clear_password_cache, get_password_hash
 
         """Update user"""
         update_data = obj_in.model_dump(exclude_unset=True)
 
         # Handle password update
         if "password" in update_data:
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = await get_password_hash(update_data["password"])
             update_data["hashed_password"] = hashed_password
             del update_data["password"]
+            clear_password_cache()
 
         # Update fields
         for field, value in update_data.items():
             setattr(db_obj, field, value)
 
         db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        await db.flush()
 
         return db_obj
 
     @staticmethod
     async def authenticate(
         db: AsyncSession, *, email: str, password: str
-    ) -> Optional[User]:
+    ) -> Optional[Row[Any]]:
         from app.core.security import verify_password
 
-        """Authenticate user by email and password"""
-        user = await UserCRUD.get_user_by_email(db, email=email)
+        """
+        Authenticate user by email and password.
+        Returns only the columns login needs, not a full User entity.
+        """
+        query = select(
+            User.id,
+            User.email,
+            User.username,
+            User.hashed_password,
+            User.is_active,
+            User.is_superuser,
+            User.role,
+        ).where(User.email == email)
+        result = await db.execute(query)
+        user = result.one_or_none()
         if not user:
             return None
-        if not verify_password(password, str(user.hashed_password)):
+        if not await verify_password(password, str(user.hashed_password)):
             return None
         return user
 
     @staticmethod
-    async def delete_user(db: AsyncSession, *, user_id: int) -> bool:
-        """Delete user (soft delete by marking as inactive)"""
+    async def delete_user(
+        db: AsyncSession, *, user_id: int, redis_client: redis.Redis
+    ) -> bool:
+        """
+        Delete user (soft delete by marking as inactive). The cached auth view
+        of the user is dropped once committed, so the old is_active stops
+        being served.
+        """
+        from app.core.security import user_cache_key
+
         query = (
             update(User)
             .where(User.id == user_id)
             .values(is_active=False)
-            .returning(User.id)
+            .returning(User.email)
         )
 
         result = await db.execute(query)
-        await db.commit()
+        email = result.scalar()
+        if email is None:
+            return False
 
-        return result.scalar() is not None
+        on_commit(db, lambda: redis_client.delete(user_cache_key(email)))
+        return True
 
     @staticmethod
     async def update_last_login(db: AsyncSession, *, user_id: int) -> None:
@@ -186,29 +240,48 @@ class UserCRUD:
             .values(last_login=datetime.now(timezone.utc))
         )
         await db.execute(query)
-        await db.commit()
+
+    @staticmethod
+    async def set_last_logins(db: AsyncSession, logins: dict[int, datetime]) -> None:
+        """Set last_login for many users in a single UPDATE ... FROM (VALUES)"""
+        if not logins:
+            return
+        rows = values(
+            column("id", BigInteger),
+            column("ts", DateTime(timezone=True)),
+            name="logins",
+        ).data(list(logins.items()))
+        query = update(User).where(User.id == rows.c.id).values(last_login=rows.c.ts)
+        await db.execute(query)
 
     @staticmethod
     async def get_with_stats(db: AsyncSession, user_id: int) -> dict[str, Any] | None:
         """Get user with statistics (post count, comment count, etc.)"""
-        from sqlalchemy import func
-
-        # Subquery for post count
-        post_count_subq = (
-            select(func.count()).where(Post.author_id == user_id).scalar_subquery()
+        # Each count is aggregated once in a derived table and joined in,
+        # rather than evaluated as a correlated sub-plan per statement
+        post_counts = (
+            select(Post.author_id, func.count().label("cnt"))
+            .where(Post.author_id == user_id)
+            .group_by(Post.author_id)
+            .subquery()
         )
-
-        # Subquery for comment count
-        comment_count_subq = (
-            select(func.count()).where(Comment.user_id == user_id).scalar_subquery()
+        comment_counts = (
+            select(Comment.user_id, func.count().label("cnt"))
+            .where(Comment.user_id == user_id)
+            .group_by(Comment.user_id)
+            .subquery()
         )
 
-        # Main query
-        query = select(
-            User,
-            post_count_subq.label("post_count"),
-            comment_count_subq.label("comment_count"),
-        ).where(User.id == user_id)
+        query = (
+            select(
+                User,
+                func.coalesce(post_counts.c.cnt, 0).label("post_count"),
+                func.coalesce(comment_counts.c.cnt, 0).label("comment_count"),
+            )
+            .outerjoin(post_counts, post_counts.c.author_id == User.id)
+            .outerjoin(comment_counts, comment_counts.c.user_id == User.id)
+            .where(User.id == user_id)
+        )
 
         result = await db.execute(query)
         row = result.first()
@@ -227,18 +300,28 @@ class UserCRUD:
 
     @staticmethod
     async def update_password(
-        db: AsyncSession, user_id: int, new_password: str
+        db: AsyncSession, user_id: int, new_password: str, redis_client: redis.Redis
     ) -> None:
-        from app.core.security import get_password_hash
+        """Set a new password and drop the user's cached auth view once committed"""
+        from app.core.security import (
+            clear_password_cache,
+            get_password_hash,
+            user_cache_key,
+        )
 
-        password_hashed = get_password_hash(new_password)
+        password_hashed = await get_password_hash(new_password)
         query = (
             update(User)
             .where(User.id == user_id)
             .values(hashed_password=password_hashed)
+            .returning(User.email)
         )
-        await db.execute(query)
-        await db.commit()
+        result = await db.execute(query)
+        clear_password_cache()
+
+        email = result.scalar()
+        if email is not None:
+            on_commit(db, lambda: redis_client.delete(user_cache_key(email)))
 
 
 user_crud = UserCRUD()
@@ -1,18 +1,27 @@
-from typing import AsyncGenerator, Generator, Any
-from sqlalchemy import NullPool
+from typing import Any, AsyncGenerator, Awaitable, Callable
+import asyncio
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import Session
 from app.core.config import settings
 from sqlalchemy.orm import DeclarativeBase
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
 # create async engine for PostgreSQL
 async_engine = create_async_engine(
     str(settings.DATABASE_URL),
     echo=settings.LOG_LEVEL == "DEBUG",
-    poolclass=NullPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    # Rows per multi-row INSERT ... VALUES when executing many parameter sets
+    insertmanyvalues_page_size=1000,
+    connect_args={
+        # JIT compilation costs more than it saves on short OLTP queries
+        "server_settings": {"jit": "off"},
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    },
     future=True,
 )
 
@@ -32,6 +41,40 @@ class Base(DeclarativeBase):
     pass
 
 
+async def create_tables() -> None:
+    """Create extensions and tables directly from the models (dev only)"""
+    async with async_engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS ltree"))
+        await conn.run_sync(Base.metadata.create_all)
+    print("Database tables created!")
+
+
+async def warm_db_pool(connections: int) -> None:
+    """
+    Open `connections` pooled connections up front so the first requests
+    after startup don't pay the connect + auth handshake.
+    """
+
+    async def ping() -> None:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
+
+async def commit(session: AsyncSession) -> None:
+    """
+    Commit the session, then run its on_commit callbacks.
+    Write handlers call this before returning: get_async_db's own commit
+    runs only after the response has been sent, so a client could otherwise
+    read back stale data or miss a failed commit.
+    """
+    await session.commit()
+    for callback in session.info.pop("after_commit", []):
+        await callback()
+
+
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency function to get async database session.
@@ -42,7 +85,8 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
 
     try:
         yield session
-        await session.commit()
+        # Catches anything a handler left uncommitted; a no-op otherwise
+        await commit(session)
     except Exception:
         await session.rollback()
         raise
@@ -50,21 +94,10 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
         await session.close()
 
 
-sync_engine = create_engine(
-    str(settings.DATABASE_URL).replace("postgresql+asyncpg", "postgresql"),
-    pool_pre_ping=True,
-    pool_recycle=300,
-)
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
-
-
-def get_sync_db() -> Generator[Any, Any]:
+def on_commit(session: AsyncSession, callback: Callable[[], Awaitable[Any]]) -> None:
     """
-    Get syncronous database session for background tasks or CLI
+    Run `callback` after commit() commits the session, e.g. to drop a
+    cache entry so a concurrent reader can't re-cache the old row before
+    the new one is visible. Dropped if the transaction rolls back.
     """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    session.info.setdefault("after_commit", []).append(callback)
@@ -1,6 +1,8 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from fastapi_pagination import add_pagination
 from fastapi_cache import FastAPICache
@@ -11,16 +13,23 @@ import uvicorn
 # from app.api.v1.api import api_router
 # from app import api_router
 from app.api import auth
+from app.core.cache import ORJSONCoder
 from app.core.config import settings
 from app.core.exceptions import setup_exception_handlers
-from app.database import async_engine, Base
+from app.core.security import create_redis_client
+from app.core.last_login import flush_last_logins, run_last_login_flusher
+from app.middleware.rate_limit import RateLimitScripts
+from app.database import create_tables, warm_db_pool
 from app.api import posts
 
-from app.middleware.logging import LoggingMiddleware
+from app.middleware.logging import LoggingMiddleware, configure_logging
 # from app.middleware.rate_limit import setup_rate_limiting
 # from app.core.exceptions import setup_exception_handlers
 
 
+configure_logging()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -31,20 +40,35 @@ async def lifespan(app: FastAPI):
     # Startup
     print("Starting up...")
 
-    # Create database tables (in production, use Alembic migrations)
-    if settings.ENVIRONMENT == "development":
-        async with async_engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        print("Database tables created!")
+    # Shared Redis client for auth, sessions and blacklisting
+    app.state.redis = create_redis_client()
+    app.state.rate_limit_scripts = RateLimitScripts.register(app.state.redis)
+
+    # Warm up concurrently: pooled DB connections, a Redis connection and,
+    # if enabled, tables (otherwise run `alembic upgrade head`)
+    startup_tasks = [warm_db_pool(settings.DB_POOL_WARM), app.state.redis.ping()]
+    if settings.AUTO_CREATE_TABLES:
+        startup_tasks.append(create_tables())
+    await asyncio.gather(*startup_tasks)
+
+    # Periodically write buffered logins to the database
+    last_login_flusher = asyncio.create_task(run_last_login_flusher(app.state.redis))
 
     # Initialize Redis cache
     redis_client = await redis.from_url(settings.REDIS_URL)
-    FastAPICache.init(RedisBackend(redis_client), prefix="fastapi-cache")
+    FastAPICache.init(
+        RedisBackend(redis_client), prefix="fastapi-cache", coder=ORJSONCoder
+    )
     print("Redis cache initialized!")
 
     yield
 
     # Shutdown
+    last_login_flusher.cancel()
+    # Let a cancelled tick unwind before the final flush claims new batches
+    await asyncio.gather(last_login_flusher, return_exceptions=True)
+    await flush_last_logins(app.state.redis)
+    await app.state.redis.aclose()
     # print("Shutting down...")
     # if redis_client:
     #     await redis_client.close()
@@ -58,6 +82,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Set up CORS
@@ -107,5 +132,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        loop="uvloop",
+        http="httptools",
         log_level=settings.LOG_LEVEL.lower(),
     )
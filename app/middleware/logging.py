@@ -1,45 +1,99 @@
+import logging
 import time
+import orjson
 import structlog
 from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
 
 logger = structlog.get_logger()
 
+_DEBUG = settings.LOG_LEVEL.upper() == "DEBUG"
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging HTTP requests"""
 
-    async def dispatch(self, request: Request, call_next):
+def configure_logging() -> None:
+    """
+    Configure structlog once at startup: level filtering happens before any
+    processor runs, and lines are rendered with orjson straight to bytes.
+    """
+    structlog.configure(
+        processors=[
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso", utc=True),
+            structlog.processors.JSONRenderer(serializer=orjson.dumps),
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(
+            getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+        ),
+        logger_factory=structlog.BytesLoggerFactory(),
+        cache_logger_on_first_use=True,
+    )
+
+
+class LoggingMiddleware:
+    """
+    Middleware for logging HTTP requests.
+
+    Plain ASGI rather than BaseHTTPMiddleware, which runs every request in
+    an extra task group and memory stream.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Start timer
-        start_time = time.time()
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
         # Process request
-        response = await call_next(request)
+        await self.app(scope, receive, send_wrapper)
 
         # Calculate processing time
-        process_time = time.time() - start_time
+        process_time = time.perf_counter() - start_time
+
+        # Successful requests get a compact line straight from the scope
+        if status_code < 400 and not _DEBUG:
+            logger.info(
+                "request",
+                m=scope["method"],
+                p=scope["path"],
+                s=status_code,
+                t=round(process_time, 6),
+            )
+            return
 
         # Log request
+        request = Request(scope)
         log_data = {
             "method": request.method,
             "url": str(request.url),
-            "status_code": response.status_code,
+            "status_code": status_code,
             "process_time": process_time,
             "client_ip": request.client.host if request.client else None,
             "user_agent": request.headers.get("user-agent"),
         }
 
         # Add user info if available
-        if hasattr(request.state, "user"):
-            log_data["user_id"] = request.state.user.id
-            log_data["user_email"] = request.state.user.email
+        user = scope.get("state", {}).get("user")
+        if user is not None:
+            log_data["user_id"] = user.id
+            log_data["user_email"] = user.email
 
         # Log based on status code
-        if response.status_code >= 500:
+        if status_code >= 500:
             logger.error("server_error", **log_data)
-        elif response.status_code >= 400:
+        elif status_code >= 400:
             logger.warning("client_error", **log_data)
         else:
             logger.info("request", **log_data)
-
-        return response
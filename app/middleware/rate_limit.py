@@ -1,66 +1,138 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from functools import wraps
 from fastapi import Request, HTTPException, status
 import redis.asyncio as redis
-from app.core.config import settings
-from typing import Callable, Optional
-
+from redis.commands.core import AsyncScript
+from typing import Callable
+import math
+import secrets
+import time
+import uuid
+
+
+# Sliding-window log: one sorted-set member per request, scored by its
+# timestamp in ms. Returns {count including this request, retry_after_ms}.
+SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+local n = redis.call('ZCARD', KEYS[1])
+if n >= limit then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    local retry = window
+    if oldest[2] then retry = tonumber(oldest[2]) + window - now end
+    return {n + 1, retry}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], window)
+return {n + 1, 0}
+"""
+
+# Approximate sliding window (two fixed-window counters, the previous one
+# weighted by how much of it still overlaps the window). Constant memory
+# per key, for high-volume endpoints.
+APPROX_SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local elapsed = now % window
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local weighted = math.floor(previous * (window - elapsed) / window) + current
+if weighted >= limit then
+    return {weighted + 1, window - elapsed}
+end
+redis.call('INCR', KEYS[1])
+redis.call('PEXPIRE', KEYS[1], window * 2)
+return {weighted + 1, 0}
+"""
+
+# In-flight request set: members are request ids scored by start time, so
+# entries left behind by crashed workers age out after the window.
+# Returns 1 if the request is admitted, 0 otherwise.
+CONCURRENCY_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+if redis.call('ZCARD', KEYS[1]) >= limit then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], window)
+return 1
+"""
+
+WINDOW_MS = 60_000
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitScripts:
+    """Lua scripts bound to the shared Redis client, stored on app.state"""
+
+    sliding_window: AsyncScript
+    approx_sliding_window: AsyncScript
+    concurrency: AsyncScript
+
+    @classmethod
+    def register(cls, redis_client: redis.Redis) -> "RateLimitScripts":
+        """Called once from the app lifespan"""
+        return cls(
+            sliding_window=redis_client.register_script(SLIDING_WINDOW_LUA),
+            approx_sliding_window=redis_client.register_script(
+                APPROX_SLIDING_WINDOW_LUA
+            ),
+            concurrency=redis_client.register_script(CONCURRENCY_LUA),
+        )
 
-redis_client: Optional[redis.Redis] = None
 
+def get_client_ip(request: Request) -> str:
+    if request.client:
+        return request.client.host
+    # Fallback for testing
+    return "127.0.0.1"
 
-async def get_redis():
-    global redis_client
-    if redis_client is None:
-        redis_client = await redis.from_url(
-            settings.REDIS_URL,
-            encoding="utf-8",
-            decode_responses=True,
-        )
-    return redis_client
 
+def manual_rate_limit(requests_per_minute: int = 5, approximate: bool = False):
+    """
+    Sliding-window rate limiting, evaluated atomically in a single Lua call.
 
-def manual_rate_limit(requests_per_minute: int = 5):
-    """Simple, reliable manual rate limiting"""
+    With approximate=True a two-counter weighted window is used instead of a
+    per-request log, trading exactness for constant memory per client.
+    """
 
     def decorator(func: Callable):
         @wraps(func)
         async def wrapper(request: Request, *args, **kwargs):
-            redis_conn = await get_redis()
-
-            # Get client IP
-            if request.client:
-                client_ip = request.client.host
-            else:
-                # Fallback for testing
-                client_ip = "127.0.0.1"
+            scripts: RateLimitScripts = request.app.state.rate_limit_scripts
 
-            # Create Redis key
-            key = f"rate_limit:{client_ip}:{request.url.path}"
+            client_ip = get_client_ip(request)
+            now_ms = int(time.time() * 1000)
+            base_key = f"rl:{{{client_ip}:{request.url.path}}}"
 
-            # Get current count
-            current = await redis_conn.get(key)
-            current_count = int(current) if current else 0
+            if approximate:
+                bucket = now_ms // WINDOW_MS
+                count, retry_ms = await scripts.approx_sliding_window(
+                    keys=[f"{base_key}:{bucket}", f"{base_key}:{bucket - 1}"],
+                    args=[now_ms, WINDOW_MS, requests_per_minute],
+                )
+            else:
+                count, retry_ms = await scripts.sliding_window(
+                    keys=[base_key],
+                    args=[now_ms, WINDOW_MS, requests_per_minute, uuid.uuid4().hex],
+                )
 
             # Check if limit exceeded
-            if current_count >= requests_per_minute:
-                # Get TTL to show when it resets
-                ttl = await redis_conn.ttl(key)
+            if int(count) > requests_per_minute:
+                retry_after = max(1, math.ceil(int(retry_ms) / 1000))
                 raise HTTPException(
                     status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail=f"Rate limit exceeded. Maximum {requests_per_minute} requests per minute. Try again in {ttl} seconds.",
-                    headers={"Retry-After": str(ttl if ttl > 0 else 60)},
+                    detail=f"Rate limit exceeded. Maximum {requests_per_minute} requests per minute. Try again in {retry_after} seconds.",
+                    headers={"Retry-After": str(retry_after)},
                 )
 
-            # Use pipeline for atomic operations
-            pipeline = redis_conn.pipeline()
-            pipeline.incr(key)
-
-            # Set expire only on first increment
-            if current_count == 0:
-                pipeline.expire(key, 60)  # Reset after 60 seconds
-
-            await pipeline.execute()
-
             # Call the original function
             return await func(request, *args, **kwargs)
 
@@ -77,9 +149,41 @@ def auth_rate_limit():
 
 def api_rate_limit():
     """60 requests per minute for general API"""
-    return manual_rate_limit(60)
+    return manual_rate_limit(60, approximate=True)
 
 
 def strict_rate_limit():
     """10 requests per minute for sensitive operations"""
     return manual_rate_limit(10)
+
+
+@asynccontextmanager
+async def concurrency_limit(request: Request, max_in_flight: int, window_s: int = 60):
+    """
+    Bound the number of in-flight requests per client for a route.
+
+    Unlike the frequency limiters above this caps concurrent work, so one
+    client cannot tie up workers or DB connections with slow requests.
+    window_s is the longest a request may hold its slot before it is
+    considered abandoned.
+    """
+    redis_conn: redis.Redis = request.app.state.redis
+    scripts: RateLimitScripts = request.app.state.rate_limit_scripts
+
+    key = f"concurrency:{get_client_ip(request)}:{request.url.path}"
+    request_id = secrets.token_hex(4)
+    admitted = await scripts.concurrency(
+        keys=[key],
+        args=[int(time.time() * 1000), window_s * 1000, max_in_flight, request_id],
+    )
+    if not admitted:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many concurrent requests. Maximum {max_in_flight} in flight.",
+            headers={"Retry-After": "1"},
+        )
+
+    try:
+        yield
+    finally:
+        await redis_conn.zrem(key, request_id)
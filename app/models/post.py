@@ -1,4 +1,6 @@
 from sqlalchemy import (
+    DDL,
+    BigInteger,
     Column,
     Index,
     Integer,
@@ -9,19 +11,45 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Table,
-    ARRAY,
     CheckConstraint,
-    UniqueConstraint,
+    Computed,
+    FetchedValue,
+    event,
     text,
 )
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import UserDefinedType
+import os
+import time
 import uuid
 from app.database import Base
 from sqlalchemy.dialects.postgresql import JSONB
 
+
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7): a 48-bit millisecond timestamp
+    followed by random bits. New keys land at the right edge of the primary
+    key B-tree instead of splitting pages at random like uuid4.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10))
+    value = value & ~(0xF << 76) | 0x7 << 76  # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
+class LTREE(UserDefinedType):
+    """PostgreSQL ltree (label path) from the ltree extension; read as str"""
+
+    cache_ok = True
+
+    def get_col_spec(self, **kw) -> str:
+        return "LTREE"
+
+
 # Association table for many-to-many relationship
 # post_categories = Table(
 #     "post_categories",
@@ -43,6 +71,27 @@ post_categories = Table(
     PrimaryKeyConstraint("post_id", "category_id"),
 )
 
+# Tags are normalized: each name is stored once in `tags`, posts reference
+# it by an integer id. The (tag_id, post_id) index serves "posts with tag X".
+post_tags = Table(
+    "post_tags",
+    Base.metadata,
+    Column(
+        "post_id",
+        UUID(as_uuid=True),
+        ForeignKey("posts.id", ondelete="CASCADE"),
+        nullable=False,
+    ),
+    Column(
+        "tag_id",
+        Integer,
+        ForeignKey("tags.id", ondelete="CASCADE"),
+        nullable=False,
+    ),
+    PrimaryKeyConstraint("post_id", "tag_id"),
+    Index("idx_post_tags_tag", "tag_id", "post_id"),
+)
+
 
 class Post(Base):
     """
@@ -51,60 +100,72 @@ class Post(Base):
 
     __tablename__ = "posts"
 
+    # Fetch server-generated columns (created_at, updated_at, search_vector)
+    # with RETURNING during flush instead of a later SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
     # Using UUID for distributed systems
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     title = Column(String(200), nullable=False)
     slug = Column(String(200), unique=True, index=True, nullable=False)
     content = Column(Text, nullable=False)
     excerpt = Column(String(500))
 
     # Status
-    published = Column(Boolean, default=False, index=True)
+    published = Column(Boolean, default=False)
     published_at = Column(DateTime(timezone=True), nullable=True)
 
     # SEO
     meta_title = Column(String(200))
     meta_description = Column(String(500))
 
-    # Statistics
+    # Statistics. like_count and comment_count are maintained by triggers on
+    # likes and comments (see LIKE_COUNT_FUNCTION below)
     view_count = Column(Integer, default=0, index=True)
     like_count = Column(Integer, default=0)
     comment_count = Column(Integer, default=0)
 
     # Foreign keys
-    author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    author_id = Column(
+        BigInteger, ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
 
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    # PostgreSQL arrays for tags
-    # tags = Column(ARRAY(String(50)), nullable=False, server_default=text("'{}'"))
-    tags: Mapped[list[str]] = mapped_column(
-        ARRAY(String(50)),
-        nullable=False,
-        server_default=text("'{}'"),
-    )
-    # tags = Column(
-    #     ARRAY(String(50)),
-    #     nullable=False,
-    #     server_default=text("'{}'"),
-    # )
+    # Tag names, read through tag_objects (post_tags). Writes go through
+    # PostCRUD.set_tags rather than this proxy
+    tags = association_proxy("tag_objects", "name")
 
     # JSONB for flexible metadata
-    post_metadata = Column(JSONB, default=dict, nullable=False)
+    post_metadata = Column(
+        JSONB, default=dict, server_default=text("'{}'::jsonb"), nullable=False
+    )
 
-    # Full-text search vector (PostgreSQL specific)
-    search_vector = Column(TSVECTOR)
+    # Full-text search vector (PostgreSQL specific), maintained by Postgres
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(excerpt, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(content, '')), 'C')",
+            persisted=True,
+        ),
+    )
 
-    # Relationships with explicit cascade rules
-    author = relationship("User", back_populates="posts")
+    # Relationships with explicit cascade rules. The author is serialized
+    # with every post, so it is joined into every Post query by default
+    author = relationship("User", back_populates="posts", lazy="joined")
     categories = relationship(
         "Category",
         secondary=post_categories,
         back_populates="posts",
         lazy="selectin",  # Eager loading strategy
     )
+    tag_objects = relationship(
+        "Tag", secondary=post_tags, order_by="Tag.name", lazy="selectin"
+    )
     comments = relationship(
         "Comment",
         back_populates="post",
@@ -120,10 +181,58 @@ class Post(Base):
         CheckConstraint("view_count >= 0", name="view_count_positive"),
         # Partial index for performance
         # Index("idx_posts_published", "published", postgresql_where=(published == True)),
+        # Published feed ordered by publish date
+        Index(
+            "idx_posts_published_at",
+            "published_at",
+            postgresql_where=text("published = true"),
+        ),
+        # Per-author published feed
+        Index(
+            "idx_posts_author_published",
+            "author_id",
+            "published_at",
+            postgresql_where=text("published = true"),
+        ),
         # Full-text search index
         Index("idx_posts_search", "search_vector", postgresql_using="gin"),
-        # Index on array column (PostgreSQL specific)
-        Index("idx_posts_tags", "tags", postgresql_using="gin"),
+        # Covering partial index so published-post statistics (overall and
+        # per author) are index-only scans
+        Index(
+            "idx_posts_published_stats",
+            "author_id",
+            postgresql_include=["view_count"],
+            postgresql_where=text("published = true"),
+        ),
+        # Keyset pagination on the default ordering (scanned backwards for DESC)
+        Index("idx_posts_created_at_id", "created_at", "id"),
+        # Date-range (archive) scans. Rows arrive in created_at order, so a
+        # BRIN summary of a few KB replaces walking the B-tree above
+        Index(
+            "idx_posts_created_brin",
+            "created_at",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+        ),
+        # Trigram indexes so ILIKE '%term%' search can use an index (pg_trgm)
+        Index(
+            "idx_posts_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_posts_excerpt_trgm",
+            "excerpt",
+            postgresql_using="gin",
+            postgresql_ops={"excerpt": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_posts_content_trgm",
+            "content",
+            postgresql_using="gin",
+            postgresql_ops={"content": "gin_trgm_ops"},
+        ),
     )
 
     def __repr__(self) -> str:
@@ -135,15 +244,22 @@ class Comment(Base):
 
     __tablename__ = "comments"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Read the trigger-set path back with RETURNING on insert
+    __mapper_args__ = {"eager_defaults": True}
+
+    id = Column(BigInteger, primary_key=True, index=True)
     content = Column(Text, nullable=False)
 
     # Hierarchical comments (self-referential foreign key)
-    parent_id = Column(Integer, ForeignKey("comments.id"), nullable=True)
+    parent_id = Column(BigInteger, ForeignKey("comments.id"), nullable=True)
+    # Materialized ancestor path ending in this comment's id, e.g. 12.40.57,
+    # set by the comments_set_path trigger so a whole thread is one index
+    # range (path <@ root) and sorts parent-before-child by path
+    path = Column(LTREE, server_default=FetchedValue())
 
     # Foreign keys
     post_id = Column(UUID(as_uuid=True), ForeignKey("posts.id", ondelete="CASCADE"))
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="SET NULL"))
 
     # Status
     is_approved = Column(Boolean, default=True)
@@ -160,33 +276,141 @@ class Comment(Base):
     __table_args__ = (
         Index("idx_comments_post", "post_id", "created_at"),
         Index("idx_comments_user", "user_id", "created_at"),
+        Index("idx_comments_path", "path", postgresql_using="gist"),
     )
 
 
+# Fill comments.path on insert from the parent's path. Column defaults
+# (the serial id) are applied before BEFORE ROW triggers run.
+COMMENT_PATH_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION comments_set_path() RETURNS trigger AS $$
+BEGIN
+    IF NEW.parent_id IS NULL THEN
+        NEW.path := text2ltree(NEW.id::text);
+    ELSE
+        SELECT path || text2ltree(NEW.id::text) INTO NEW.path
+        FROM comments WHERE id = NEW.parent_id;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+""")
+COMMENT_PATH_TRIGGER = DDL("""
+CREATE TRIGGER comments_set_path BEFORE INSERT ON comments
+FOR EACH ROW EXECUTE FUNCTION comments_set_path()
+""")
+event.listen(Comment.__table__, "after_create", COMMENT_PATH_FUNCTION)
+event.listen(Comment.__table__, "after_create", COMMENT_PATH_TRIGGER)
+
+
 class Like(Base):
     """Like model for posts."""
 
     __tablename__ = "likes"
 
-    id = Column(Integer, primary_key=True)
-    post_id = Column(UUID(as_uuid=True), ForeignKey("posts.id", ondelete="CASCADE"))
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    # The natural key is the primary key, which also prevents duplicate likes
+    post_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("posts.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    user_id = Column(
+        BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    # Unique constraint to prevent duplicate likes
-    __table_args__ = (UniqueConstraint("post_id", "user_id", name="uq_post_user_like"),)
+    # Hash-partitioned on post_id, so per-post reads are pruned to one
+    # partition (partitions are created below)
+    __table_args__ = {"postgresql_partition_by": "HASH (post_id)"}
 
     # Relationships
     post = relationship("Post", back_populates="likes")
     user = relationship("User", back_populates="likes")
 
 
+LIKE_PARTITIONS = 16
+for remainder in range(LIKE_PARTITIONS):
+    event.listen(
+        Like.__table__,
+        "after_create",
+        DDL(
+            f"CREATE TABLE likes_p{remainder} PARTITION OF likes "
+            f"FOR VALUES WITH (MODULUS {LIKE_PARTITIONS}, REMAINDER {remainder})"
+        ),
+    )
+
+
+# Keep posts.like_count / comment_count in step with likes and comments.
+# Statement-level triggers with transition tables, so a multi-row insert or
+# delete (including ON DELETE CASCADE) costs one UPDATE per affected post.
+LIKE_COUNT_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION likes_update_post_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET like_count = like_count + d.n
+        FROM (SELECT post_id, count(*) AS n FROM new_rows GROUP BY post_id) d
+        WHERE posts.id = d.post_id;
+    ELSE
+        UPDATE posts SET like_count = like_count - d.n
+        FROM (SELECT post_id, count(*) AS n FROM old_rows GROUP BY post_id) d
+        WHERE posts.id = d.post_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""")
+LIKE_COUNT_INSERT_TRIGGER = DDL("""
+CREATE TRIGGER likes_insert_post_count AFTER INSERT ON likes
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION likes_update_post_count()
+""")
+LIKE_COUNT_DELETE_TRIGGER = DDL("""
+CREATE TRIGGER likes_delete_post_count AFTER DELETE ON likes
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION likes_update_post_count()
+""")
+COMMENT_COUNT_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION comments_update_post_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET comment_count = comment_count + d.n
+        FROM (SELECT post_id, count(*) AS n FROM new_rows GROUP BY post_id) d
+        WHERE posts.id = d.post_id;
+    ELSE
+        UPDATE posts SET comment_count = comment_count - d.n
+        FROM (SELECT post_id, count(*) AS n FROM old_rows GROUP BY post_id) d
+        WHERE posts.id = d.post_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""")
+COMMENT_COUNT_INSERT_TRIGGER = DDL("""
+CREATE TRIGGER comments_insert_post_count AFTER INSERT ON comments
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION comments_update_post_count()
+""")
+COMMENT_COUNT_DELETE_TRIGGER = DDL("""
+CREATE TRIGGER comments_delete_post_count AFTER DELETE ON comments
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION comments_update_post_count()
+""")
+for ddl in (LIKE_COUNT_FUNCTION, LIKE_COUNT_INSERT_TRIGGER, LIKE_COUNT_DELETE_TRIGGER):
+    event.listen(Like.__table__, "after_create", ddl)
+for ddl in (
+    COMMENT_COUNT_FUNCTION,
+    COMMENT_COUNT_INSERT_TRIGGER,
+    COMMENT_COUNT_DELETE_TRIGGER,
+):
+    event.listen(Comment.__table__, "after_create", ddl)
+
+
 class Category(Base):
     """Category model for organizing posts."""
 
     __tablename__ = "categories"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     name = Column(String(50), unique=True, nullable=False)
     slug = Column(String(50), unique=True, index=True, nullable=False)
     description = Column(Text)
@@ -199,13 +423,26 @@ class Category(Base):
     is_featured = Column(Boolean, default=False)
     display_order = Column(Integer, default=0, index=True)
 
-    # Relationships
+    # Relationships. Never loaded implicitly: a category can have many posts,
+    # so callers opt in with selectinload(Category.posts)
     posts = relationship(
         "Post",
         secondary="post_categories",
         back_populates="categories",
-        lazy="dynamic",  # Returns query instead of list
+        lazy="raise_on_sql",
     )
 
     def __repr__(self) -> str:
         return f"<Category(id={self.id}, name={self.name})>"
+
+
+class Tag(Base):
+    """Tag name, shared by every post that uses it."""
+
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50), unique=True, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<Tag(id={self.id}, name={self.name})>"
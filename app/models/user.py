@@ -3,7 +3,8 @@ from sqlalchemy import (
     CheckConstraint,
     Column,
     ForeignKey,
-    Integer,
+    Index,
+    BigInteger,
     String,
     DateTime,
     Enum,
@@ -33,7 +34,7 @@ class User(Base):
 
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
     username = Column(String(255), unique=True, index=True, nullable=False)
     full_name = Column(String(100))
@@ -70,6 +71,28 @@ class User(Base):
     )
     likes = relationship("Like", back_populates="user")
 
+    # Trigram indexes so ILIKE '%term%' search can use an index (pg_trgm)
+    __table_args__ = (
+        Index(
+            "idx_users_email_trgm",
+            "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_users_username_trgm",
+            "username",
+            postgresql_using="gin",
+            postgresql_ops={"username": "gin_trgm_ops"},
+        ),
+        Index(
+            "idx_users_full_name_trgm",
+            "full_name",
+            postgresql_using="gin",
+            postgresql_ops={"full_name": "gin_trgm_ops"},
+        ),
+    )
+
     # def __repr__(self) -> str:
     #     return f"<User(id={self.id}, email={self.email}, role={self.role})>"
 
@@ -81,14 +104,18 @@ class UserProfile(Base):
 
     __tablename__ = "user_profiles"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True)
+    id = Column(BigInteger, primary_key=True, index=True)
+    user_id = Column(
+        BigInteger, ForeignKey("users.id", ondelete="CASCADE"), unique=True
+    )
     website = Column(String(255), nullable=True)
     location = Column(String(255), nullable=True)
     company = Column(String(255), nullable=True)
 
     # JSON field for additional metadata
-    user_metadata = Column(JSONB, default={}, nullable=True)
+    user_metadata = Column(
+        JSONB, default=dict, server_default=text("'{}'::jsonb"), nullable=False
+    )
 
     # PostgreSQL-specific: Use check connection
     # __table_args__ = CheckConstraint(
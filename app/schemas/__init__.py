@@ -0,0 +1,9 @@
+from .category import Category
+from .comment import Comment
+from .post import PostWithCategories, PostWithComments
+
+# Resolve the schemas' forward references once at import, against an
+# explicit namespace, instead of lazily on first validation
+_types_namespace = {"Category": Category, "Comment": Comment}
+PostWithCategories.model_rebuild(_types_namespace=_types_namespace)
+PostWithComments.model_rebuild(_types_namespace=_types_namespace)
@@ -1,10 +1,7 @@
 from typing import Optional, List
 from pydantic import BaseModel, ConfigDict, Field
 from uuid import UUID
-from .post import Post, PostWithCategories, PostWithComments
-
-PostWithCategories.model_rebuild()
-PostWithComments.model_rebuild()
+from .post import Post
 
 
 class CategoryBase(BaseModel):
@@ -0,0 +1,34 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from uuid import UUID
+
+from .user import User
+
+
+class CommentBase(BaseModel):
+    """Base comment schema"""
+
+    content: str = Field(..., min_length=1)
+    parent_id: Optional[int] = None
+
+
+class CommentCreate(CommentBase):
+    """Schema for creating a comment"""
+
+    pass
+
+
+class Comment(CommentBase):
+    """Comment schema for API responses, with nested replies"""
+
+    id: int
+    post_id: UUID
+    user_id: Optional[int] = None
+    is_approved: bool
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    user: Optional[User] = None
+    replies: list["Comment"] = []
+
+    model_config = ConfigDict(from_attributes=True)
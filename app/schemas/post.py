@@ -1,14 +1,17 @@
-from typing import Optional, Any, ForwardRef
+from typing import TYPE_CHECKING, Optional, Any
 from datetime import datetime
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 from uuid import UUID
 
 from .user import User
 
+# Resolved by the model_rebuild calls in app/schemas/__init__.py
+if TYPE_CHECKING:
+    from .category import Category
+    from .comment import Comment
 
-# Forward references
-CategoryRef = ForwardRef("Category")
-CommentRef = ForwardRef("Comment")
+MAX_TAGS = 10
+MAX_TAG_LENGTH = 50
 
 
 class PostBase(BaseModel):
@@ -23,11 +26,10 @@ class PostBase(BaseModel):
     @field_validator("tags")
     def validate_tags(cls, v):
         """Validate tags array"""
-        if len(v) > 10:
-            raise ValueError("Maximum 10 tags allowed")
-        for tag in v:
-            if len(tag) > 50:
-                raise ValueError("Tag must be 50 characters or less")
+        if len(v) > MAX_TAGS:
+            raise ValueError(f"Maximum {MAX_TAGS} tags allowed")
+        if any(len(tag) > MAX_TAG_LENGTH for tag in v):
+            raise ValueError(f"Tag must be {MAX_TAG_LENGTH} characters or less")
         return v
 
 
@@ -63,7 +65,8 @@ class PostInDBBase(PostBase):
     updated_at: Optional[datetime] = None
     published_at: Optional[datetime] = None
 
-    model_config = ConfigDict(from_attributes=True)
+    # Read-only once built from the ORM row
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class Post(PostInDBBase):
@@ -75,7 +78,7 @@ class Post(PostInDBBase):
 class PostWithCategories(Post):
     """Post schema with categories"""
 
-    categories: list[CategoryRef] = []
+    categories: list["Category"] = []
 
 
 class PostWithComments(Post):
@@ -1,5 +1,5 @@
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from datetime import datetime
 
 
@@ -29,6 +29,8 @@ class Token(BaseModel):
         None, description="Exact datetime when the access token expires"
     )
 
+    model_config = ConfigDict(frozen=True)
+
 
 class TokenPayload(BaseModel):
     """
@@ -67,6 +69,8 @@ class TokenPayload(BaseModel):
         None, description="Username (if included in token)", examples=["john_doe"]
     )
 
+    model_config = ConfigDict(frozen=True)
+
 
 class TokenCreate(BaseModel):
     """
@@ -181,7 +185,9 @@ class PasswordReset(BaseModel):
         examples=["NewStrongPassword123!"],
     )
 
-    def model_post_init(self, __context):
+    @model_validator(mode="after")
+    def passwords_match(self):
         """Validate that passwords match."""
         if self.new_password != self.confirm_password:
             raise ValueError("Passwords do not match")
+        return self
@@ -4,13 +4,16 @@ from pydantic import (
     BaseModel,
     EmailStr,
     Field,
-    ValidationInfo,
     field_validator,
+    model_validator,
     ConfigDict,
 )
 import re
 from enum import Enum
 
+# ASCII letters, digits and underscore, checked in C rather than per character
+_username_fullmatch = re.compile(r"[A-Za-z0-9_]+").fullmatch
+
 
 class UserRole(str, Enum):
     User = "user"
@@ -25,7 +28,7 @@ class UserBase(BaseModel):
 
     @field_validator("username")
     def username_alphanumeric(cls, v):
-        if not re.match(r"^[a-zA-Z0-9_]+$", v):
+        if not _username_fullmatch(v):
             raise ValueError("Username must be alphanumeric with underscore only")
         return v
 
@@ -34,12 +37,11 @@ class UserCreate(UserBase):
     password: str = Field(..., min_length=8)
     confirm_password: str
 
-    @field_validator("confirm_password")
-    @classmethod
-    def password_match(cls, v, info: ValidationInfo):
-        if "password" in info.data and v != info.data["password"]:
+    @model_validator(mode="after")
+    def password_match(self):
+        if self.password != self.confirm_password:
             raise ValueError("Password do not match")
-        return v
+        return self
 
 
 class UserUpdate(UserBase):
@@ -62,7 +64,8 @@ class UserInDBBase(UserBase):
     updated_at: Optional[datetime] = None
     last_login: Optional[datetime] = None
 
-    model_config = ConfigDict(from_attributes=True)
+    # Read-only once built from the ORM row
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class User(UserInDBBase):